@@ -0,0 +1,75 @@
+"""Measure cold ``import kpr`` latency in fresh interpreters.
+
+Run from the repository root:
+
+    python -m benchmarks.import_time [--runs N] [--json]
+
+Each run starts a new Python process with HOME pointed at a throwaway
+directory, so the benchmark also checks that importing kpr touches no files.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Timed inside the child, so interpreter start-up noise cannot make an import look negative.
+_IMPORT = "import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+
+
+def _time_process(code, env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], env=env, cwd=REPO_ROOT, check=True)
+    return time.perf_counter() - start
+
+
+def _time_import(module, env):
+    result = subprocess.run([sys.executable, "-c", _IMPORT.format(module=module)], env=env, cwd=REPO_ROOT,
+                            check=True, capture_output=True, text=True)
+    return float(result.stdout.split()[-1])
+
+
+def measure(runs=20, module="kpr"):
+    """Return median/min import times in milliseconds, each measured in a fresh interpreter."""
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home, PYTHONDONTWRITEBYTECODE="1")
+        baseline = [_time_process("pass", env) for _ in range(runs)]
+        imports = [_time_import(module, env) for _ in range(runs)]
+        touched = os.listdir(home)
+
+    return {
+        "module": module,
+        "runs": runs,
+        "interpreter_ms": round(statistics.median(baseline) * 1000, 3),
+        "import_median_ms": round(statistics.median(imports) * 1000, 3),
+        "import_min_ms": round(min(imports) * 1000, 3),
+        "files_created": touched,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark cold import latency of kpr.")
+    parser.add_argument("--runs", type=int, default=20, help="Interpreter launches per measurement")
+    parser.add_argument("--module", default="kpr", help="Module to import")
+    parser.add_argument("--json", action="store_true", help="Emit results as JSON")
+    args = parser.parse_args(argv)
+
+    result = measure(args.runs, args.module)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(f"import {result['module']}: {result['import_median_ms']:.1f} ms median, "
+              f"{result['import_min_ms']:.1f} ms best (interpreter start {result['interpreter_ms']:.1f} ms)")
+        if result["files_created"]:
+            print(f"warning: import created {result['files_created']} in HOME")
+    return 1 if result["files_created"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
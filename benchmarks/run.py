@@ -0,0 +1,175 @@
+"""Benchmark harness for the kpr managers and inspector.
+
+Run from the repository root:
+
+    python -m benchmarks.run --scales 1k,100k --output results.json
+    python -m benchmarks.run --scales 1k,100k --compare results.json --threshold 0.25
+
+Each scale builds a synthetic database (see benchmarks/synthetic.py) in a
+temporary directory, so runs are offline and never touch ~/kpr_db. Results
+are written as JSON; --compare checks them against an earlier results file
+and exits non-zero if any metric regressed by more than the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from . import import_time, synthetic
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCALES = {"1k": 1000, "10k": 10000, "100k": 100000, "1m": 1000000}
+SEARCH_TERMS = ("budget", "meeting report", "gro", "deploy review", "zulu")
+
+
+def _median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def _peak_kb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def _metric(results, name, value, unit, better):
+    results[name] = {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def bench_scale(rows, directory, seed=1):
+    """Build a database with rows per table and return its metrics."""
+    from kpr.inspector import SQLiteDBInspector
+    from kpr.managers.stores import NoteStore, ToDoStore, HourStore
+
+    timings = {}
+    db_path = synthetic.build(directory, rows, seed, timings)
+    results = {}
+    _metric(results, "insert.notes_bulk", rows / timings["notes"], "rows/s", "higher")
+    _metric(results, "insert.hours_bulk", rows / timings["hours"], "rows/s", "higher")
+
+    notes, todos, hours = NoteStore(db_path), ToDoStore(db_path), HourStore(db_path)
+
+    _metric(results, "insert.single_note", _median_ms(lambda: notes.add_note("single", "row"), 200), "ms", "lower")
+
+    _metric(results, "search.notes", statistics.median(
+        _median_ms(lambda: notes.search_notes(term), 5) for term in SEARCH_TERMS), "ms", "lower")
+    _metric(results, "search.todos", statistics.median(
+        _median_ms(lambda: todos.search_todos(term), 5) for term in SEARCH_TERMS), "ms", "lower")
+
+    _metric(results, "list.list_notes_peak", _peak_kb(notes.list_notes), "KiB", "lower")
+    _metric(results, "list.iter_notes_peak", _peak_kb(lambda: sum(1 for _ in notes.iter_notes())), "KiB", "lower")
+    _metric(results, "list.deep_page", _median_ms(
+        lambda: list(notes.iter_notes(after_id=rows // 2, limit=100)), 20), "ms", "lower")
+
+    todo_ids = [row[0] for row in todos.iter_todos(limit=100)]
+    ids = iter(todo_ids)
+    _metric(results, "todos.mark_completed", _median_ms(lambda: todos.mark_completed_by_id(next(ids)), len(todo_ids)),
+            "ms", "lower")
+
+    _metric(results, "hours.totals_by_job", _median_ms(hours.totals_by_job, 10), "ms", "lower")
+    _metric(results, "hours.totals_by_month", _median_ms(lambda: hours.totals_by_period("month"), 10), "ms", "lower")
+    _metric(results, "hours.view_range", _median_ms(lambda: hours.view_hours(start="2018-01-01", end="2018-01-31"), 10),
+            "ms", "lower")
+
+    inspector = SQLiteDBInspector(db_path)
+    _metric(results, "summary.exact", _median_ms(lambda: inspector.db_summary(use_cache=False), 3), "ms", "lower")
+    _metric(results, "summary.approximate", _median_ms(
+        lambda: inspector.db_summary(approximate=True, use_cache=False), 3), "ms", "lower")
+    inspector.db_summary()
+    _metric(results, "summary.cached", _median_ms(inspector.db_summary, 20), "ms", "lower")
+    inspector.close_all()
+
+    notes.close()
+    return results
+
+
+def compare(current, baseline, threshold):
+    """Return a list of (scale, metric, old, new, change) for metrics worse than threshold."""
+    regressions = []
+    for scale, metrics in current["results"].items():
+        for name, metric in metrics.items():
+            old = baseline.get("results", {}).get(scale, {}).get(name)
+            # A relative change from a zero or negative baseline has no meaningful sign.
+            if not old or old["value"] <= 0:
+                continue
+            change = (metric["value"] - old["value"]) / old["value"]
+            worse = change > threshold if metric["better"] == "lower" else change < -threshold
+            if worse:
+                regressions.append((scale, name, old["value"], metric["value"], change))
+    return regressions
+
+
+def _meta():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark kpr managers and inspector.")
+    parser.add_argument("--scales", default="1k,100k", help=f"Comma-separated scales from {', '.join(SCALES)}")
+    parser.add_argument("--output", help="Write results JSON to this file")
+    parser.add_argument("--compare", help="Baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed relative regression (0.25 = 25%%)")
+    parser.add_argument("--import-runs", type=int, default=10, help="Interpreter launches for the cold import benchmark")
+    args = parser.parse_args(argv)
+
+    report = {"meta": _meta(), "results": {}}
+    for scale in args.scales.split(","):
+        scale = scale.strip().lower()
+        if scale not in SCALES:
+            parser.error(f"unknown scale {scale!r}")
+        with tempfile.TemporaryDirectory(prefix="kpr-bench-") as directory:
+            print(f"[{scale}] building and measuring...", file=sys.stderr)
+            report["results"][scale] = bench_scale(SCALES[scale], directory)
+
+    cold = import_time.measure(args.import_runs)
+    report["results"]["import"] = {}
+    _metric(report["results"]["import"], "import.cold", cold["import_median_ms"], "ms", "lower")
+
+    for scale, metrics in report["results"].items():
+        for name, metric in metrics.items():
+            print(f"{scale:>7} {name:<24} {metric['value']:>14.3f} {metric['unit']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for scale, name, old, new, change in regressions:
+            print(f"REGRESSION {scale} {name}: {old} -> {new} ({change:+.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
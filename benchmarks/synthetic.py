@@ -0,0 +1,71 @@
+"""Synthetic kpr databases for benchmarking.
+
+Data is generated from a seeded RNG so every run at a given scale builds
+the same database. Databases are created under a caller-supplied directory,
+never under ~/kpr_db.
+"""
+import os
+import random
+import time
+from datetime import date, timedelta
+
+WORDS = (
+    "alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima mike "
+    "november oscar papa quebec romeo sierra tango uniform victor whiskey xray yankee zulu "
+    "meeting budget invoice grocery report deploy review backup garden travel"
+).split()
+JOBS = [f"job-{n:02d}" for n in range(25)]
+START = date(2015, 1, 1)
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def notes(rng, count):
+    for _ in range(count):
+        yield sentence(rng, 3), sentence(rng, 40)
+
+
+def todos(rng, count):
+    for i in range(count):
+        deadline = (START + timedelta(days=rng.randrange(4000))).isoformat() if i % 3 else None
+        yield sentence(rng, 12), deadline
+
+
+def hours(rng, count):
+    for _ in range(count):
+        day = START + timedelta(days=rng.randrange(4000))
+        yield rng.choice(JOBS), round(rng.uniform(0.25, 8), 2), day.isoformat()
+
+
+def appointments(rng, count):
+    for _ in range(count):
+        day = START + timedelta(days=rng.randrange(4000))
+        yield sentence(rng, 3), day.isoformat(), f"{rng.randrange(8, 18):02d}:{rng.choice((0, 30)):02d}", sentence(rng, 8)
+
+
+def build(directory, rows, seed=1, timings=None):
+    """Create kpr.db in directory with rows notes, todos, hour entries and appointments.
+
+    Returns the database path. If timings is a dict, the seconds each
+    table's bulk insert took are stored in it under the table name.
+    """
+    from kpr.managers.stores import NoteStore, ToDoStore, HourStore, CalendarStore
+
+    db_path = os.path.join(directory, "kpr.db")
+    rng = random.Random(seed)
+    timings = {} if timings is None else timings
+
+    def timed(table, insert, rows):
+        start = time.perf_counter()
+        insert(rows)
+        timings[table] = time.perf_counter() - start
+
+    timed("notes", NoteStore(db_path).add_notes_bulk, notes(rng, rows))
+    timed("todos", ToDoStore(db_path).add_todos_bulk, todos(rng, rows))
+    hour_store = HourStore(db_path)
+    hour_store.set_total_hours(rows * 10.0)
+    timed("hours", hour_store.log_hours_bulk, hours(rng, rows))
+    timed("appointments", CalendarStore(db_path).add_appointments_bulk, appointments(rng, rows))
+    return db_path
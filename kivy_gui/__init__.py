@@ -1,9 +1,24 @@
 # kivy_gui/__init__.py
-from .baseapp import BaseApp
-from .utils.logger import Logger
-from .utils.theming import Theme
-from .screens.basescreen import BaseScreen
-from .widgets.basewidget import BaseWidget
-from .layouts.baselayout import BaseLayout
-
-__all__ = ['BaseApp', 'Theme', 'BaseScreen', 'BaseWidget', 'BaseLayout']
+import importlib
+
+# Components are imported on first use, so Kivy-free modules such as
+# kivy_gui.utils.paging can be imported without Kivy installed.
+_EXPORTS = {
+    'BaseApp': '.baseapp',
+    'Logger': '.utils.logger',
+    'Theme': '.utils.theming',
+    'BaseScreen': '.screens.basescreen',
+    'DataListScreen': '.screens.datalistscreen',
+    'BaseWidget': '.widgets.basewidget',
+    'BaseLayout': '.layouts.baselayout',
+}
+
+__all__ = ['BaseApp', 'Theme', 'BaseScreen', 'DataListScreen', 'BaseWidget', 'BaseLayout']
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
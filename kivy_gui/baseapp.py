@@ -12,3 +12,8 @@ class BaseApp(App):
 
     def build(self):
         return self.screen_manager
+
+    def run_async(self):
+        """Run the app on an asyncio event loop so screens can await kpr.managers.AsyncKpr calls."""
+        import asyncio
+        asyncio.run(self.async_run(async_lib='asyncio'))
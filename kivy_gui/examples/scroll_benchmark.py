@@ -0,0 +1,124 @@
+"""Scroll benchmark for DataListScreen on a synthetic kpr database.
+
+Run from the repository root:
+
+    python kivy_gui/examples/scroll_benchmark.py --rows 100000 --frames 2000
+    python kivy_gui/examples/scroll_benchmark.py --headless
+    python kivy_gui/examples/scroll_benchmark.py --no-render
+
+The database is built in a temporary directory with benchmarks/synthetic.py.
+--headless uses SDL's dummy video driver and Kivy's mock GL backend so the
+app runs without a display (xvfb-run works too). --no-render only pages
+through the table with PagedWindow, to separate query cost from layout cost.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def _summary(samples_ms):
+    samples = sorted(samples_ms)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def page_through(fetch, page_size, max_pages):
+    """Walk the whole table one page at a time and time each page."""
+    from kivy_gui.utils.paging import PagedWindow
+
+    window = PagedWindow(fetch, page_size, max_pages)
+    window.reset()
+    samples, peak = [], len(window)
+    while not window.at_end:
+        start = time.perf_counter()
+        window.next_page()
+        samples.append((time.perf_counter() - start) * 1000)
+        peak = max(peak, len(window))
+    return dict(_summary(samples), pages=len(samples), peak_window_rows=peak)
+
+
+def scroll(fetch, frames, step_px, page_size, max_pages):
+    """Scroll a DataListScreen down by step_px every frame and time the frames."""
+    from kivy.config import Config
+    Config.set('graphics', 'maxfps', '0')
+
+    from kivy.clock import Clock
+    from kivy_gui import BaseApp
+    from kivy_gui.screens.datalistscreen import DataListScreen
+
+    results = {}
+
+    class ScrollBenchmarkApp(BaseApp):
+        def build(self):
+            self.screen = DataListScreen(fetch, page_size, max_pages, name='list')
+            self.add_screen(self.screen)
+            return super(ScrollBenchmarkApp, self).build()
+
+        def on_start(self):
+            self.samples, self.widgets = [], []
+            self.last = time.perf_counter()
+            Clock.schedule_interval(self.step, 0)
+
+        def step(self, dt):
+            now = time.perf_counter()
+            self.samples.append((now - self.last) * 1000)
+            self.last = now
+            screen = self.screen
+            self.widgets.append(len(screen.layout.children))
+            hidden = screen.layout.height - screen.view.height
+            if hidden > 0:
+                screen.view.scroll_y = max(screen.view.scroll_y - step_px / hidden, 0)
+            if len(self.samples) >= frames or (screen.window.at_end and screen.view.scroll_y == 0):
+                window_rows = screen.window.rows
+                results.update(_summary(self.samples[1:]), frames=len(self.samples),
+                               last_row_id=window_rows[-1][0] if window_rows else None,
+                               window_rows=len(window_rows), max_row_widgets=max(self.widgets))
+                self.stop()
+                return False
+
+    ScrollBenchmarkApp().run()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure DataListScreen scrolling on a synthetic kpr database.")
+    parser.add_argument("--rows", type=int, default=100000, help="Rows per table in the synthetic database")
+    parser.add_argument("--frames", type=int, default=2000, help="Frames to scroll for")
+    parser.add_argument("--step", type=float, default=48, help="Pixels scrolled per frame")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--max-pages", type=int, default=5)
+    parser.add_argument("--headless", action="store_true", help="Run without a display")
+    parser.add_argument("--no-render", action="store_true", help="Only time paging through the table")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("KIVY_NO_ARGS", "1")
+    if args.headless:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("KIVY_GL_BACKEND", "mock")
+
+    from benchmarks import synthetic
+    from kpr.managers.stores import NoteStore
+
+    with tempfile.TemporaryDirectory(prefix="kpr-scroll-") as directory:
+        print(f"Building a {args.rows}-row database...", file=sys.stderr)
+        notes = NoteStore(synthetic.build(directory, args.rows))
+        if args.no_render:
+            results = page_through(notes.iter_notes, args.page_size, args.max_pages)
+        else:
+            results = scroll(notes.iter_notes, args.frames, args.step, args.page_size, args.max_pages)
+        notes.close()
+
+    for name, value in results.items():
+        print(f"{name:>18} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 # kivy_gui/screens/__init__.py
 from .basescreen import BaseScreen
+from .datalistscreen import DataListScreen
 
-__all__ = ['BaseScreen']
+__all__ = ['BaseScreen', 'DataListScreen']
@@ -0,0 +1,113 @@
+# kivy_gui/screens/datalistscreen.py
+from concurrent.futures import ThreadPoolExecutor
+
+from kivy.clock import Clock
+from kivy.metrics import dp
+from kivy.properties import BooleanProperty, NumericProperty
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview import RecycleView
+
+from .basescreen import BaseScreen
+from ..utils.logger import Logger
+from ..utils.paging import PagedWindow
+
+
+class DataListScreen(BaseScreen):
+    """Scrollable list of kpr rows that only ever holds a few pages.
+
+    fetch is a keyset-paginated reader such as NoteStore.iter_notes or
+    HourStore.iter_hours. The RecycleView recycles a screenful of row
+    widgets, and a PagedWindow keeps at most max_pages pages of rows:
+    approaching either end of the window loads the neighbouring page on a
+    background thread and drops one from the far end, keeping the visible
+    rows in place. Widget count and memory therefore stay flat whatever the
+    table size.
+    """
+
+    row_height = NumericProperty(dp(32))
+    # Start loading the next page when fewer than this many rows remain below the viewport.
+    prefetch_rows = NumericProperty(40)
+    loading = BooleanProperty(False)
+
+    def __init__(self, fetch, page_size=100, max_pages=5, format_row=None, viewclass='Label', **kwargs):
+        super(DataListScreen, self).__init__(**kwargs)
+        self.window = PagedWindow(fetch, page_size, max_pages)
+        self.format_row = format_row or (lambda row: {'text': ' | '.join('' if v is None else str(v) for v in row)})
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+        self.layout = RecycleBoxLayout(orientation='vertical', size_hint_y=None,
+                                       default_size=(None, self.row_height), default_size_hint=(1, None))
+        self.layout.bind(minimum_height=self.layout.setter('height'))
+        self.view = RecycleView(viewclass=viewclass)
+        self.view.add_widget(self.layout)
+        self.view.bind(scroll_y=self._on_scroll)
+        self.add_widget(self.view)
+
+    def on_pre_enter(self, *args):
+        if not self.window.pages:
+            self.refresh()
+
+    def refresh(self):
+        """Reload from the first row."""
+        self.window.reset()
+        self._show()
+        self.view.scroll_y = 1
+
+    def _show(self):
+        self.view.data = [self.format_row(row) for row in self.window.rows]
+
+    def _rows_below(self):
+        hidden = max(self.layout.height - self.view.height, 0)
+        return self.view.scroll_y * hidden / self.row_height
+
+    def _rows_above(self):
+        hidden = max(self.layout.height - self.view.height, 0)
+        return (1 - self.view.scroll_y) * hidden / self.row_height
+
+    def _on_scroll(self, view, scroll_y):
+        if self.loading:
+            return
+        if self._rows_below() < self.prefetch_rows and not self.window.at_end:
+            self._prefetch_next()
+        elif self._rows_above() < self.prefetch_rows and not self.window.at_start:
+            self._prefetch_previous()
+
+    def _load(self, after_id, finish):
+        """Fetch the page after after_id on the executor, then call finish(after_id, future) on the main thread."""
+        self.loading = True
+        future = self._executor.submit(lambda: list(self.window.fetch(after_id=after_id, limit=self.window.page_size)))
+        future.add_done_callback(lambda f: Clock.schedule_once(lambda dt: finish(after_id, f)))
+
+    def _prefetch_next(self):
+        self._load(self.window.next_after_id(), self._finish_next)
+
+    def _prefetch_previous(self):
+        self._load(self.window.previous_after_id(), self._finish_previous)
+
+    def _loaded(self, future):
+        self.loading = False
+        if future.exception() is not None:
+            Logger.error(f"DataListScreen: loading a page failed: {future.exception()!r}")
+            return False
+        return True
+
+    def _finish_next(self, after_id, future):
+        if not self._loaded(future) or after_id != self.window.next_after_id():
+            return  # failed, or the window moved (e.g. refresh) while the page loaded
+        self._apply(*self.window.next_page(future.result()), forward=True)
+
+    def _finish_previous(self, after_id, future):
+        if not self._loaded(future) or self.window.at_start or after_id != self.window.previous_after_id():
+            return
+        self._apply(*self.window.previous_page(future.result()), forward=False)
+
+    def _apply(self, added, dropped, forward):
+        """Show the new window while keeping the rows on screen where they were."""
+        if not added and not dropped:
+            return
+        offset = self._rows_above()
+        offset += -dropped if forward else added
+        self._show()
+        # RecycleBoxLayout sizes itself on the next frame; compute from row counts instead.
+        hidden = max(len(self.window) * self.row_height - self.view.height, 0)
+        self.view.scroll_y = 1 - min(max(offset * self.row_height / hidden, 0), 1) if hidden else 1
@@ -1 +1,4 @@
-from sysops im
\ No newline at end of file
+# kivy_gui/utils/logger.py
+from kivy.logger import Logger
+
+__all__ = ['Logger']
@@ -0,0 +1,101 @@
+# kivy_gui/utils/paging.py
+from collections import deque
+
+
+class PagedWindow:
+    """Sliding window of rows over a keyset-paginated source.
+
+    fetch(after_id=..., limit=...) must return rows in id order, like the
+    kpr stores' iter_* methods. At most max_pages pages are held; paging
+    forward drops pages from the front and paging back reloads them, so
+    memory stays bounded however large the table is. Only the id each
+    dropped page started after is remembered.
+    """
+
+    def __init__(self, fetch, page_size=100, max_pages=5, key=None):
+        self.fetch = fetch
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.key = key or (lambda row: row[0])
+        self.pages = deque()      # (after_id, rows) pairs, in order
+        self._dropped = []        # after_id of each page dropped from the front
+        self.at_end = False
+
+    def _load(self, after_id):
+        return list(self.fetch(after_id=after_id, limit=self.page_size))
+
+    def reset(self):
+        """Load the first page and return it."""
+        self.pages.clear()
+        self._dropped.clear()
+        self.at_end = False
+        rows = self._load(None)
+        self.pages.append((None, rows))
+        self.at_end = len(rows) < self.page_size
+        return rows
+
+    @property
+    def rows(self):
+        return [row for _, page in self.pages for row in page]
+
+    def __len__(self):
+        return sum(len(page) for _, page in self.pages)
+
+    @property
+    def at_start(self):
+        return not self._dropped
+
+    def next_page(self, rows=None):
+        """Append the page after the window; return (added, dropped) row counts.
+
+        rows may be passed in if the page was already fetched, e.g. on a
+        background thread using next_after_id().
+        """
+        if self.at_end or not self.pages:
+            return 0, 0
+        after_id = self._last_id()
+        if rows is None:
+            rows = self._load(after_id)
+        if len(rows) < self.page_size:
+            self.at_end = True
+        if not rows:
+            return 0, 0
+        self.pages.append((after_id, rows))
+        dropped = 0
+        if len(self.pages) > self.max_pages:
+            start, page = self.pages.popleft()
+            self._dropped.append(start)
+            dropped = len(page)
+        return len(rows), dropped
+
+    def previous_page(self, rows=None):
+        """Reload the page before the window; return (added, dropped) row counts.
+
+        rows may be passed in if the page was already fetched with
+        previous_after_id(), as for next_page().
+        """
+        if not self._dropped:
+            return 0, 0
+        after_id = self._dropped.pop()
+        if rows is None:
+            rows = self._load(after_id)
+        self.pages.appendleft((after_id, rows))
+        dropped = 0
+        if len(self.pages) > self.max_pages:
+            dropped = len(self.pages.pop()[1])
+            self.at_end = False
+        return len(rows), dropped
+
+    def next_after_id(self):
+        """Return the after_id the next page would be fetched with, or None at the end."""
+        return None if self.at_end or not self.pages else self._last_id()
+
+    def previous_after_id(self):
+        """Return the after_id the previous page would be fetched with; check at_start first."""
+        return self._dropped[-1] if self._dropped else None
+
+    def _last_id(self):
+        for _, page in reversed(self.pages):
+            if page:
+                return self.key(page[-1])
+        return self.pages[-1][0]
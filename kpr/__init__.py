@@ -1,5 +1,35 @@
-from .inspector import SQLiteDBInspector
-from .managers import ToDoManager, HourTracker, CalendarManager, Formatter, NoteManager
+import importlib
 
-# Initialize instances of each class and store them in a list
-all_modules = [NoteManager(), ToDoManager(), HourTracker(), Formatter(), CalendarManager(), SQLiteDBInspector()]
+# Managers, the inspector and their dependencies load on first attribute
+# access, so a bare ``import kpr`` does no I/O and imports nothing heavy.
+_LAZY = {
+    "SQLiteDBInspector": ".inspector",
+    "NoteManager": ".managers",
+    "ToDoManager": ".managers",
+    "HourTracker": ".managers",
+    "Formatter": ".managers",
+    "CalendarManager": ".managers",
+    "DB_PATH": ".managers",
+    "NoteStore": ".managers",
+    "ToDoStore": ".managers",
+    "HourStore": ".managers",
+    "CalendarStore": ".managers",
+}
+
+__all__ = list(_LAZY) + ["all_modules"]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    elif name == "all_modules":
+        from .inspector import SQLiteDBInspector
+        from .managers import NoteManager, ToDoManager, HourTracker, Formatter, CalendarManager, DB_PATH
+
+        # Initialize instances of each class on first access and keep them
+        value = [NoteManager(), ToDoManager(), HourTracker(), Formatter(), CalendarManager(),
+                 SQLiteDBInspector(DB_PATH)]
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
@@ -1,11 +1,34 @@
+import csv
+import json
 import sqlite3
 import os
+import re
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+# db_summary results per (database path, approximate), with the change key they were computed under.
+_summary_cache = {}
+
+
+# The content= option of an FTS virtual table, naming the table it indexes.
+_FTS_CONTENT = re.compile(r"\bcontent\s*=\s*['\"]?([^'\",)\s]*)", re.IGNORECASE)
+# FTS shadow tables keyed by document rowid, and those with no per-row meaning.
+_ROWID_SHADOWS = ("_content", "_docsize")
+_INDEX_SHADOWS = ("_data", "_idx", "_config")
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
 
 class SQLiteDBInspector:
     def __init__(self, db_path):
         """Initialize the class with the path to the SQLite database."""
         self.db_path = db_path
         self.connection = None
+        self._summary_conn = None
 
     def connect(self):
         """Connect to the SQLite database."""
@@ -21,6 +44,13 @@ class SQLiteDBInspector:
         if self.connection:
             self.connection.close()
 
+    def close_all(self):
+        """Close the query connection and the long-lived summary connection."""
+        self.close()
+        if self._summary_conn is not None:
+            self._summary_conn.close()
+            self._summary_conn = None
+
     def list_tables(self):
         """List all tables in the SQLite database."""
         if not self.connect():
@@ -66,14 +96,330 @@ class SQLiteDBInspector:
         self.close()
         return result
 
-    def db_summary(self):
-        """Provide a summary of the database including tables and row counts."""
-        tables = self.list_tables()
+    def iter_query(self, query, params=(), batch_size=1000):
+        """Execute a query and yield its rows in lists of at most batch_size.
+
+        Rows are pulled from SQLite as they are consumed, so memory stays
+        bounded by one batch. Errors are raised rather than printed.
+        """
+        for _, batch in self._stream(query, params, batch_size):
+            if batch:
+                yield batch
+
+    def _stream(self, query, params, batch_size):
+        """Yield (column names, batch) pairs from a dedicated connection.
+
+        The first batch is yielded even when the query returns no rows, so
+        callers always see the column names.
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.execute(query, params)
+            columns = [d[0] for d in cursor.description or ()]
+            batch = cursor.fetchmany(batch_size)
+            yield columns, batch
+            while batch:
+                batch = cursor.fetchmany(batch_size)
+                if batch:
+                    yield columns, batch
+        finally:
+            conn.close()
+
+    def preview(self, query, params=(), limit=20):
+        """Return the column names and at most limit rows of a query.
+
+        SELECT statements are wrapped in LIMIT so SQLite can stop early
+        (and use a top-N sort for ORDER BY) instead of producing every row.
+        """
+        if query.lstrip().split(None, 1)[0].upper() in ("SELECT", "WITH", "VALUES"):
+            query = f"SELECT * FROM ({query.rstrip().rstrip(';')}) LIMIT {int(limit)}"
+        try:
+            for columns, batch in self._stream(query, params, limit):
+                return columns, batch
+        except sqlite3.Error as e:
+            print(f"Query failed: {e}")
+            return None
+        return [], []
+
+    def export(self, query, path, fmt=None, params=(), batch_size=10000):
+        """Stream a query's results to a CSV, JSON Lines or Parquet file.
+
+        The format defaults to the file extension (.csv, .jsonl/.ndjson,
+        .parquet). Parquet needs pyarrow and is written one row group per
+        batch. A column whose values do not all fit the type of its first
+        batch is written as text. A query without rows still writes the CSV
+        header, or an empty Parquet file with text columns. Returns the number of rows written, or None if the query failed.
+        """
+        fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+        writers = {"csv": _export_csv, "jsonl": _export_jsonl, "ndjson": _export_jsonl, "parquet": _export_parquet}
+        if fmt not in writers:
+            raise ValueError(f"Unsupported export format: {fmt!r}")
+        try:
+            return writers[fmt](lambda: self._stream(query, params, batch_size), path)
+        except sqlite3.Error as e:
+            print(f"Query failed: {e}")
+            return None
+
+    def db_summary(self, approximate=False, workers=None, use_cache=True):
+        """Provide a summary of the database including tables and row counts.
+
+        approximate=True reads counts from sqlite_stat1 when ANALYZE has been
+        run and otherwise from max(rowid), which is one index probe instead of a
+        full scan but over-counts after deletes. Full-text tables report the
+        estimate of the table they index; their index-only shadow tables
+        report None. workers=N runs exact counts in
+        parallel on N read-only connections. Results are cached and reused until
+        the database file, its WAL or PRAGMA data_version changes.
+        """
+        conn = self._summary_connection()
+        if conn is None:
+            return "No tables found or unable to connect to the database."
+        key = self._change_key(conn)
+        cache_key = (os.path.abspath(self.db_path), approximate)
+        cached = _summary_cache.get(cache_key)
+        if use_cache and cached and cached[0] == key:
+            return dict(cached[1])
+
+        tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table';")]
         if not tables:
             return "No tables found or unable to connect to the database."
 
-        summary = {}
+        if approximate:
+            summary = self._approximate_counts(conn, tables)
+        elif workers and workers > 1:
+            summary = self._parallel_counts(tables, workers)
+        else:
+            summary = {table: conn.execute(f"SELECT COUNT(*) FROM {_quote(table)};").fetchone()[0] for table in tables}
+
+        _summary_cache[cache_key] = (key, summary)
+        return dict(summary)
+
+    def snapshot(self, path=None, approximate=False):
+        """Record the row count of every table, optionally saving it as JSON to path.
+
+        The result has the same shape as the manifest written next to each
+        kpr backup, so either can be passed to diff_snapshots.
+        """
+        tables = self.db_summary(approximate=approximate)
+        if not isinstance(tables, dict):
+            return None
+        snapshot = {"db_path": os.path.abspath(self.db_path), "taken_at": time.time(), "tables": tables}
+        if path:
+            with open(path, "w") as f:
+                json.dump(snapshot, f, indent=2)
+        return snapshot
+
+    @staticmethod
+    def diff_snapshots(old, new):
+        """Return {table: (old_rows, new_rows)} for tables whose row count differs.
+
+        Each side is a snapshot dict or the path of a saved snapshot or backup
+        manifest. A table missing on one side has None there.
+        """
+        old, new = _load_snapshot(old)["tables"], _load_snapshot(new)["tables"]
+        return {table: (old.get(table), new.get(table)) for table in sorted(set(old) | set(new))
+                if old.get(table) != new.get(table)}
+
+    def _summary_connection(self):
+        """Long-lived connection for summaries, so PRAGMA data_version can detect other writers."""
+        if self._summary_conn is None:
+            if not os.path.exists(self.db_path):
+                return None
+            try:
+                self._summary_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            except sqlite3.Error as e:
+                print(f"Error connecting to database: {e}")
+                return None
+        return self._summary_conn
+
+    def _change_key(self, conn):
+        stats = []
+        for path in (self.db_path, self.db_path + "-wal"):
+            try:
+                st = os.stat(path)
+                stats.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stats.append(None)
+        return (id(conn), conn.execute("PRAGMA data_version;").fetchone()[0], tuple(stats))
+
+    def _approximate_counts(self, conn, tables):
+        counts = {}
+        try:
+            # The first number of every sqlite_stat1 row is the table's row count.
+            for table, rows in conn.execute("SELECT tbl, MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 GROUP BY tbl;"):
+                counts[table] = rows
+        except sqlite3.OperationalError:
+            pass
+        virtual = {name: sql for name, sql in conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type='table' AND sql LIKE 'CREATE VIRTUAL TABLE%';")}
+
+        def estimate(table):
+            if table in counts:
+                return counts[table]
+            try:
+                rows = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {_quote(table)};").fetchone()[0]
+            except sqlite3.OperationalError:
+                # WITHOUT ROWID tables have no rowid to probe.
+                rows = conn.execute(f"SELECT COUNT(*) FROM {_quote(table)};").fetchone()[0]
+            counts[table] = rows
+            return rows
+
+        # Counting a virtual table reads every row it indexes (all of notes, for
+        # an external-content FTS table), so estimate it from what backs it.
         for table in tables:
-            summary[table] = self.row_count(table)
-        return summary
+            if table in counts:
+                continue
+            if table in virtual:
+                content = _FTS_CONTENT.search(virtual[table])
+                if content and content.group(1) in tables:
+                    counts[table] = estimate(content.group(1))
+                elif table + "_docsize" in tables:
+                    counts[table] = estimate(table + "_docsize")
+                elif table + "_content" in tables:
+                    counts[table] = estimate(table + "_content")
+                elif content:
+                    counts[table] = None  # contentless, or its content table is elsewhere
+                else:
+                    counts[table] = conn.execute(f"SELECT COUNT(*) FROM {_quote(table)};").fetchone()[0]
+            elif any(table == name + suffix for name in virtual for suffix in _INDEX_SHADOWS):
+                counts[table] = None
+            else:
+                estimate(table)
+        return {table: counts[table] for table in tables}
+
+    def _parallel_counts(self, tables, workers):
+        local = threading.local()
+        opened = []
+        lock = threading.Lock()
+
+        def count(table):
+            conn = getattr(local, "conn", None)
+            if conn is None:
+                uri = "file:" + urllib.parse.quote(os.path.abspath(self.db_path)) + "?mode=ro"
+                conn = local.conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+                with lock:
+                    opened.append(conn)
+            return conn.execute(f"SELECT COUNT(*) FROM {_quote(table)};").fetchone()[0]
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return dict(zip(tables, pool.map(count, tables)))
+        finally:
+            for conn in opened:
+                conn.close()
+
+
+def _load_snapshot(snapshot):
+    if isinstance(snapshot, str):
+        with open(snapshot) as f:
+            return json.load(f)
+    return snapshot
+
+
+def _export_csv(open_stream, path):
+    rows = 0
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        header_written = False
+        for columns, batch in open_stream():
+            if not header_written and columns:
+                writer.writerow(columns)
+                header_written = True
+            writer.writerows(batch)
+            rows += len(batch)
+    return rows
+
+
+def _json_default(value):
+    if isinstance(value, bytes):
+        return value.hex()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _export_jsonl(open_stream, path):
+    rows = 0
+    with open(path, "w") as f:
+        for columns, batch in open_stream():
+            f.writelines(json.dumps(dict(zip(columns, row)), default=_json_default) + "\n" for row in batch)
+            rows += len(batch)
+    return rows
+
+
+class _MixedTypes(Exception):
+    """Raised when a Parquet export meets values that do not fit a column's type."""
+
+    def __init__(self, columns):
+        super().__init__(", ".join(sorted(columns)))
+        self.columns = set(columns)
+
+
+def _text(value):
+    if value is None or isinstance(value, str):
+        return value
+    return value.hex() if isinstance(value, bytes) else str(value)
+
+
+def _export_parquet(open_stream, path):
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+    # SQLite columns can hold any type, and a column's Parquet type is fixed
+    # by the first batch. If a later batch does not fit, the query is run
+    # again with those columns written as text. The file is written next to
+    # path and renamed into place only once it is complete.
+    text = set()
+    tmp = path + ".tmp"
+    while True:
+        try:
+            rows = _write_parquet(open_stream(), tmp, text)
+        except _MixedTypes as e:
+            text |= e.columns
+            continue
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        os.replace(tmp, path)
+        return rows
+
+
+def _write_parquet(stream, path, text):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
 
+    rows = 0
+    writer = None
+    try:
+        for columns, batch in stream:
+            arrays, mixed = [], set()
+            for name, values in zip(columns, zip(*batch) if batch else [()] * len(columns)):
+                if name in text or not batch:
+                    # No rows gives no types either, so an empty result is written as text.
+                    arrays.append(pa.array([_text(v) for v in values], pa.string()))
+                    continue
+                try:
+                    arrays.append(pa.array(list(values)))
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    mixed.add(name)
+            if mixed:
+                raise _MixedTypes(mixed)
+            table = pa.Table.from_arrays(arrays, names=columns)
+            if writer is None:
+                # A column that is all NULL in the first batch has no type yet; store it as text.
+                schema = pa.schema([f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in table.schema])
+                writer = pq.ParquetWriter(path, schema)
+            for field, column in zip(writer.schema, table.columns):
+                try:
+                    column.cast(field.type)
+                except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                    mixed.add(field.name)
+            if mixed:
+                raise _MixedTypes(mixed)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
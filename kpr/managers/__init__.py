@@ -1,4 +1,43 @@
-from .kpr_manager import NoteManager, ToDoManager, HourTracker, Formatter, CalendarManager
-from .logs import Logger
-# Initialize instances of each class and store them in a list
-all_modules = [NoteManager(), ToDoManager(), HourTracker(), Formatter(), CalendarManager()]
+import importlib
+
+# Nothing is imported or opened until it is first used: importing the
+# package must stay free of I/O so short-lived scripts can import it cheaply.
+_LAZY = {
+    "NoteManager": ".kpr_manager",
+    "ToDoManager": ".kpr_manager",
+    "HourTracker": ".kpr_manager",
+    "Formatter": ".kpr_manager",
+    "CalendarManager": ".kpr_manager",
+    "DatabaseManager": ".stores",
+    "DB_PATH": ".stores",
+    "NoteStore": ".stores",
+    "ToDoStore": ".stores",
+    "HourStore": ".stores",
+    "CalendarStore": ".stores",
+    "Logger": ".logs",
+    "AsyncKpr": ".aio",
+    "Note": ".rows",
+    "Todo": ".rows",
+    "CompletedTodo": ".rows",
+    "HourEntry": ".rows",
+    "Appointment": ".rows",
+    "metrics": ".profiling",
+    "enable_metrics": ".profiling",
+    "disable_metrics": ".profiling",
+}
+
+__all__ = list(_LAZY) + ["all_modules"]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    elif name == "all_modules":
+        from .kpr_manager import NoteManager, ToDoManager, HourTracker, Formatter, CalendarManager
+
+        # Initialize instances of each class on first access and keep them
+        value = [NoteManager(), ToDoManager(), HourTracker(), Formatter(), CalendarManager()]
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
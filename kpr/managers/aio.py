@@ -0,0 +1,109 @@
+import asyncio
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .stores import DB_PATH, READ_PREFIXES, NoteStore, ToDoStore, HourStore, CalendarStore
+
+# asyncio facade over the headless stores. Every call runs on a worker
+# thread so an event loop (e.g. Kivy's, via App.async_run) never blocks on
+# SQLite. Writes go to a single writer thread, which serializes them within
+# the process; reads fan out over a small pool. Each worker thread gets its
+# own pooled connection, so readers never share a connection with the writer.
+
+
+class AsyncExecutor:
+    """One writer thread plus a pool of reader threads shared by the async stores."""
+
+    def __init__(self, readers=4):
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kpr-writer")
+        self.readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="kpr-reader")
+
+    def shutdown(self, wait=True):
+        self.writer.shutdown(wait=wait)
+        self.readers.shutdown(wait=wait)
+
+
+class AsyncStore:
+    """Wraps a store so each public method returns an awaitable.
+
+    Awaiting a cancelled call interrupts the SQLite statement it is running,
+    so a superseded search stops consuming a reader thread. latest() cancels
+    the previous in-flight call of the same method automatically, which is
+    what a search box wants while the user keeps typing.
+    """
+
+    def __init__(self, store, executor):
+        self._store = store
+        self._executor = executor
+        self._latest = {}
+
+    def __getattr__(self, name):
+        attr = getattr(self._store, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        pool = self._executor.readers if name.startswith(READ_PREFIXES) else self._executor.writer
+
+        async def call(*args, **kwargs):
+            return await self._run(pool, attr, args, kwargs)
+
+        call.__name__ = name
+        return call
+
+    async def _run(self, pool, func, args, kwargs):
+        lock = threading.Lock()
+        running = {}
+
+        def job():
+            with lock:
+                running["conn"] = self._store._connect()
+            try:
+                result = func(*args, **kwargs)
+                # Generators must be drained on the worker thread that owns the cursor.
+                return list(result) if inspect.isgenerator(result) else result
+            finally:
+                with lock:
+                    running.pop("conn", None)
+
+        future = asyncio.get_running_loop().run_in_executor(pool, job)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            with lock:
+                conn = running.get("conn")
+                if conn is not None:
+                    conn.interrupt()
+            raise
+
+    async def latest(self, name, *args, **kwargs):
+        """Call name, cancelling any earlier call to name that is still running."""
+        previous = self._latest.get(name)
+        if previous is not None and not previous.done():
+            previous.cancel()
+        task = asyncio.ensure_future(getattr(self, name)(*args, **kwargs))
+        self._latest[name] = task
+        return await task
+
+
+class AsyncKpr:
+    """Async access to notes, todos, hours and calendar on one database.
+
+    The stores are created (and the schema migrated) synchronously here, so
+    construct this once at app start-up rather than inside a frame callback.
+    """
+
+    def __init__(self, db_path=DB_PATH, readers=4):
+        self._executor = AsyncExecutor(readers)
+        self.notes = AsyncStore(NoteStore(db_path), self._executor)
+        self.todos = AsyncStore(ToDoStore(db_path), self._executor)
+        self.hours = AsyncStore(HourStore(db_path), self._executor)
+        self.calendar = AsyncStore(CalendarStore(db_path), self._executor)
+
+    def close(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,116 @@
+import os
+from contextlib import contextmanager
+
+# Cold storage for rows that only ever accumulate. Old completed to-dos and
+# hour entries are moved into a second database file attached to the live
+# connection as "archive", which keeps the live tables small enough to stay in
+# the page cache. Rows keep their ids (AUTOINCREMENT never reuses one), so
+# live and archived rows can be read back together with UNION ALL.
+
+ARCHIVE_SCHEMA = "archive"
+
+# Archivable tables: the column the cutoff applies to, and the copied columns.
+ARCHIVED_TABLES = {
+    "completed_todos": ("completed_at", "id, uuid, content, deadline, timestamp, completed_at"),
+    "hours": ("date", "id, uuid, job_name, hours_worked, date"),
+}
+
+_ARCHIVE_DDL = (
+    '''CREATE TABLE IF NOT EXISTS archive.completed_todos (
+           id INTEGER PRIMARY KEY,
+           uuid TEXT UNIQUE,
+           content TEXT NOT NULL,
+           deadline TEXT,
+           timestamp DATETIME,
+           completed_at DATETIME NOT NULL
+       )''',
+    "CREATE INDEX IF NOT EXISTS archive.idx_completed_todos_completed_at ON completed_todos (completed_at)",
+    '''CREATE TABLE IF NOT EXISTS archive.hours (
+           id INTEGER PRIMARY KEY,
+           uuid TEXT UNIQUE,
+           job_name TEXT NOT NULL,
+           hours_worked REAL NOT NULL,
+           date TEXT NOT NULL
+       )''',
+    "CREATE INDEX IF NOT EXISTS archive.idx_hours_date ON hours (date)",
+)
+
+
+def default_archive_path(db_path):
+    """Return the archive file that sits next to db_path, e.g. kpr_archive.db for kpr.db."""
+    if db_path == ":memory:":
+        return db_path
+    root, ext = os.path.splitext(db_path)
+    return f"{root}_archive{ext or '.db'}"
+
+
+def create_archive_support(conn):
+    """Create the flags table the ledger triggers consult, and the cutoff index."""
+    conn.execute("CREATE TABLE IF NOT EXISTS kpr_flags (name TEXT PRIMARY KEY) WITHOUT ROWID")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_completed_todos_completed_at ON completed_todos (completed_at)")
+
+
+def attach_archive(conn, path):
+    """Attach the archive database to conn as "archive" unless it already is."""
+    if any(row[1] == ARCHIVE_SCHEMA for row in conn.execute("PRAGMA database_list")):
+        return
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (path,))
+    # Only takes effect while the file is new; older archives need one VACUUM.
+    conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.auto_vacuum = INCREMENTAL")
+    conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.journal_mode = WAL")
+    for ddl in _ARCHIVE_DDL:
+        conn.execute(ddl)
+
+
+@contextmanager
+def archiving(conn):
+    """Mark the enclosing transaction as archiving so delete triggers leave aggregates alone."""
+    conn.execute("INSERT OR IGNORE INTO kpr_flags (name) VALUES ('archiving')")
+    try:
+        yield
+    finally:
+        conn.execute("DELETE FROM kpr_flags WHERE name = 'archiving'")
+
+
+def archive_rows(conn, table, before):
+    """Move rows of table whose cutoff column is earlier than before; return how many moved.
+
+    Must run inside a transaction on a connection with the archive attached.
+    The copy is INSERT OR REPLACE keyed on id, so re-running after an
+    interrupted archive is harmless.
+    """
+    column, columns = ARCHIVED_TABLES[table]
+    with archiving(conn):
+        conn.execute(f'''INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.{table} ({columns})
+                         SELECT {columns} FROM main.{table} WHERE {column} < ?''', (before,))
+        return conn.execute(f"DELETE FROM main.{table} WHERE {column} < ?", (before,)).rowcount
+
+
+def spanning(table):
+    """Return a FROM source reading table from both the live and archive databases."""
+    columns = ARCHIVED_TABLES[table][1]
+    return (f"(SELECT {columns} FROM main.{table} "
+            f"UNION ALL SELECT {columns} FROM {ARCHIVE_SCHEMA}.{table})")
+
+
+def free_ratio(conn, schema="main"):
+    """Return the fraction of schema's pages that are on the freelist."""
+    pages = conn.execute(f"PRAGMA {schema}.page_count").fetchone()[0]
+    free = conn.execute(f"PRAGMA {schema}.freelist_count").fetchone()[0]
+    return free / pages if pages else 0.0
+
+
+def vacuum(conn, schema="main", pages=None):
+    """Reclaim free pages in schema.
+
+    With auto_vacuum=INCREMENTAL this releases up to pages free pages (all of
+    them by default) without rewriting the file; otherwise it runs a full
+    VACUUM. Must not be called inside a transaction.
+    """
+    if conn.execute(f"PRAGMA {schema}.auto_vacuum").fetchone()[0] == 2:
+        # execute() steps the pragma once, freeing a single page; a script runs it to completion.
+        conn.executescript(f"PRAGMA {schema}.incremental_vacuum({int(pages or 0)})")
+    else:
+        conn.execute(f"VACUUM {schema}")
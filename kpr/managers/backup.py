@@ -0,0 +1,155 @@
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import time
+
+# Online backups. The copy is made with SQLite's backup API a few hundred
+# pages per step, sleeping between steps, so the copy's I/O is spread out
+# and the process never stalls for long.
+#
+# A write by another connection between steps makes SQLite restart the copy
+# from the start, which under steady writes means it never finishes. In WAL
+# mode (kpr's default) the source therefore holds one read transaction for
+# the whole copy: every step reads the same snapshot, and since WAL readers
+# never block writers, writes carry on throughout. A rollback-journal
+# database cannot do that without blocking writers, so there writers wait at
+# most one step, and the copy restarts if it is written to.
+#
+# Backups are written to a temporary file, checked, and only then renamed
+# (or gzipped) into place, with a JSON manifest of row counts alongside
+# that SQLiteDBInspector.diff_snapshots can compare.
+
+BACKUP_PAGES = 256      # pages copied per step (1 MiB at the default page size)
+BACKUP_SLEEP = 0.005    # seconds between steps
+# gzip level for compressed backups; higher levels are several times slower for a few percent.
+COMPRESS_LEVEL = 1
+
+_SQLITE_SUFFIXES = ("-wal", "-shm", "-journal")
+
+
+def default_backup_dir(db_path):
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "backups")
+
+
+def _backup_name(db_path, compress):
+    root = os.path.splitext(os.path.basename(db_path))[0]
+    return f"{root}-{time.strftime('%Y%m%d-%H%M%S')}.db" + (".gz" if compress else "")
+
+
+def row_counts(conn):
+    """Return {table: rows} for every table in conn's main database."""
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")]
+    return {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in tables}
+
+
+def check_integrity(conn):
+    """Raise sqlite3.DatabaseError unless PRAGMA integrity_check passes."""
+    problems = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    if problems != ["ok"]:
+        raise sqlite3.DatabaseError("Integrity check failed: " + "; ".join(problems[:5]))
+
+
+def manifest_path(backup_path):
+    return backup_path + ".json"
+
+
+def backup(db_path, dest=None, compress=None, verify=True, pages=BACKUP_PAGES, sleep=BACKUP_SLEEP, progress=None):
+    """Copy db_path to dest while it stays in use; return the backup's path.
+
+    dest may be a file, a directory, or None for a "backups" directory next
+    to the database. compress gzips the copy (the default when dest ends in
+    .gz). verify runs PRAGMA integrity_check on the copy before it is kept.
+    progress(remaining, total) is called after every step.
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(db_path)
+    dest = dest or default_backup_dir(db_path)
+    if compress is None:
+        compress = dest.endswith(".gz")
+    if os.path.isdir(dest) or dest.endswith(os.sep) or not os.path.splitext(dest)[1]:
+        dest = os.path.join(dest, _backup_name(db_path, compress))
+    os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+
+    started = time.time()
+    tmp = dest + ".tmp"
+    source = sqlite3.connect(db_path)
+    target = sqlite3.connect(tmp)
+    try:
+        if source.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            source.execute("BEGIN")
+            source.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()  # pins the snapshot
+        source.backup(target, pages=pages, sleep=sleep,
+                      progress=(lambda status, remaining, total: progress(remaining, total)) if progress else None)
+        # The copy inherits WAL mode from the source; make it one self-contained file.
+        target.execute("PRAGMA journal_mode = DELETE")
+        if verify:
+            check_integrity(target)
+        manifest = {"db_path": os.path.abspath(db_path), "taken_at": started,
+                    "page_count": target.execute("PRAGMA page_count").fetchone()[0],
+                    "tables": row_counts(target)}
+    except BaseException:
+        target.close()
+        os.remove(tmp)
+        raise
+    finally:
+        source.close()
+    target.close()
+
+    if compress:
+        with open(tmp, "rb") as src, gzip.open(dest + ".part", "wb", compresslevel=COMPRESS_LEVEL) as out:
+            shutil.copyfileobj(src, out, 1 << 20)
+        os.remove(tmp)
+        tmp = dest + ".part"
+    os.replace(tmp, dest)
+    manifest["seconds"] = round(time.time() - started, 3)
+    with open(manifest_path(dest), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return dest
+
+
+def restore(backup_path, db_path, verify=True, keep_previous=True):
+    """Replace db_path with a backup (plain or gzipped); return the path the old file was kept at, if any.
+
+    The backup is unpacked and checked next to db_path, and then swapped in
+    with a single rename, so db_path is never missing or half-written. The
+    old database's WAL is checkpointed first and its -wal/-shm files removed
+    so they cannot be replayed onto the restored file. Every connection to
+    db_path (other threads, other kpr processes, the daemon) must be closed
+    beforehand; DatabaseManager.restore also migrates the restored file.
+    """
+    tmp = db_path + ".restore"
+    opener = gzip.open if backup_path.endswith(".gz") else open
+    with opener(backup_path, "rb") as src, open(tmp, "wb") as out:
+        shutil.copyfileobj(src, out, 1 << 20)
+    try:
+        conn = sqlite3.connect(tmp)
+        try:
+            if verify:
+                check_integrity(conn)
+        finally:
+            conn.close()
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+    previous = None
+    if os.path.exists(db_path):
+        conn = sqlite3.connect(db_path)
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+        if keep_previous:
+            previous = db_path + ".pre-restore"
+            if os.path.exists(previous):
+                os.remove(previous)
+            os.link(db_path, previous)
+    os.replace(tmp, db_path)
+    for suffix in _SQLITE_SUFFIXES:
+        try:
+            os.remove(db_path + suffix)
+        except FileNotFoundError:
+            pass
+    return previous
@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Optional read-through cache for by-id lookups and searches. Entries are
+# dropped as soon as the database may have changed: writes on the caller's
+# own connection show up in conn.total_changes, and commits from any other
+# connection or process bump PRAGMA data_version. The PRAGMA costs about as
+# much as a primary-key lookup, so check_interval can poll it less often at
+# the price of seeing other connections' commits up to that many seconds late.
+# A connection the cache has not seen before (a new thread, or one reopened
+# after close() or restore()) could be looking at anything, so it clears too.
+
+DEFAULT_MAXSIZE = 1024
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class QueryCache:
+    """Size-bounded LRU of query results for one database."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, check_interval=0.0):
+        self.maxsize = maxsize
+        self.check_interval = check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0  # bumped by clear(), so a load that straddles one is not stored
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def _check(self, conn):
+        """Drop everything if conn is new, or has written or seen a commit since its last check."""
+        version, changes, checked = getattr(conn, "_kpr_cache_state", (None, None, 0.0))
+        now = time.monotonic()
+        if version is None or now - checked >= self.check_interval:
+            new_version, checked = conn.execute("PRAGMA data_version").fetchone()[0], now
+        else:
+            new_version = version
+        if version is None or (new_version, conn.total_changes) != (version, changes):
+            self.clear()
+        conn._kpr_cache_state = (new_version, conn.total_changes, checked)
+
+    def get_or_load(self, conn, key, load):
+        """Return the cached result for key, calling load() to fill it on a miss."""
+        self._check(conn)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = self._entries[key]
+                return list(value) if isinstance(value, list) else value
+            self.misses += 1
+            generation = self._generation
+        value = load()
+        with self._lock:
+            # A clear() while load() ran means the result may predate a write.
+            if generation == self._generation:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return list(value) if isinstance(value, list) else value
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+
+    def stats(self):
+        """Return hit/miss counters and the current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+def _cache_key(db_path):
+    return os.path.abspath(db_path) if db_path != ":memory:" else db_path
+
+
+def clear_cache(db_path):
+    """Empty db_path's cache, if it has one."""
+    cache = _caches.get(_cache_key(db_path))
+    if cache is not None:
+        cache.clear()
+
+
+def get_cache(db_path, maxsize=DEFAULT_MAXSIZE, check_interval=0.0):
+    """Return the cache shared by every store on db_path, creating or reconfiguring it."""
+    key = _cache_key(db_path)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = QueryCache(maxsize)
+        cache.maxsize = maxsize
+        cache.check_interval = check_interval
+        return cache
@@ -0,0 +1,313 @@
+import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from .profiling import TimedConnection
+
+# Pragmas applied to every pooled connection. WAL lets readers run alongside
+# the single writer, and NORMAL synchronous is durable across application
+# crashes in WAL mode while skipping an fsync per commit.
+DEFAULT_PRAGMAS = {
+    "auto_vacuum": "INCREMENTAL",  # must precede journal_mode to apply to new files
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,          # ~16 MiB page cache per connection
+    "mmap_size": 256 * 1024 * 1024,
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,          # ms to wait for another writer before SQLITE_BUSY
+}
+
+# Writes that still find the database locked once busy_timeout has run out
+# are retried this many times, with jittered exponential backoff starting
+# at BUSY_RETRY_DELAY seconds, so competing processes do not retry in step.
+BUSY_RETRIES = 5
+BUSY_RETRY_DELAY = 0.05
+
+# Every store statement has fixed text, so a larger per-connection statement
+# cache keeps all of them prepared (the sqlite3 default is 128).
+CACHED_STATEMENTS = 256
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def is_busy(exc):
+    """Return True if exc means another connection holds the database lock."""
+    return isinstance(exc, sqlite3.OperationalError) and ("locked" in str(exc) or "busy" in str(exc))
+
+
+def retry_busy(func, retries=BUSY_RETRIES, delay=BUSY_RETRY_DELAY):
+    """Call func(), retrying with jittered backoff while the database is locked.
+
+    func must be safe to re-run, i.e. a whole transaction that rolled back.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except sqlite3.OperationalError as e:
+            if attempt == retries or not is_busy(e):
+                raise
+            time.sleep(min(delay * 2 ** attempt, 1.0) * random.uniform(0.5, 1.5))
+
+
+class Connection(TimedConnection):
+    """Pooled connection.
+
+    Write transactions begin IMMEDIATE (see ConnectionPool._open), taking
+    the write lock up front, so a transaction that reads before it writes
+    waits in busy_timeout instead of failing with "database is locked" when
+    it upgrades. Inside a WriterQueue group, `with conn:` blocks become
+    savepoints of the group's transaction instead of committing on their own.
+    """
+
+    grouped = False
+
+    def __enter__(self):
+        if self.grouped:
+            self.execute("SAVEPOINT kpr_write")
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not self.grouped:
+            return super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            self.execute("ROLLBACK TO kpr_write")
+        self.execute("RELEASE kpr_write")
+        return False
+
+
+def ungrouped(func):
+    """Mark a store method that manages its own transactions or connections.
+
+    WriterQueue runs such calls on their own, between groups, instead of
+    inside a group's transaction.
+    """
+    func.ungrouped = True
+    return func
+
+
+def _resolve(future, result, error):
+    if error is None:
+        future.set_result(result)
+    else:
+        future.set_exception(error)
+
+
+class WriterQueue:
+    """One writer thread that runs write calls from any thread in grouped commits.
+
+    Calls queued while a group is being written are taken together, up to
+    max_batch, and run in a single BEGIN IMMEDIATE transaction on the
+    writer's pooled connection, so many small writes share one commit. Each
+    call runs in its own savepoint: one that raises is rolled back alone and
+    its future gets the exception. Futures resolve only after the commit.
+    Calls marked @ungrouped (vacuum, backup, close, ...) run outside any
+    group, after what was queued before them has been committed.
+    """
+
+    def __init__(self, pool, max_batch=256):
+        self.pool = pool
+        self.max_batch = max_batch
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, func, *args, **kwargs):
+        """Queue func(*args, **kwargs) for the writer thread; return a Future for its result."""
+        future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="kpr-writer-queue", daemon=True)
+                self._thread.start()
+            self._queue.put((future, func, args, kwargs))
+        return future
+
+    def call(self, func, *args, **kwargs):
+        return self.submit(func, *args, **kwargs).result()
+
+    def close(self):
+        """Finish the queued calls and stop the writer thread; it restarts on the next submit."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(None)
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self):
+        try:
+            while True:
+                batch = [self._queue.get()]
+                while batch[-1] is not None and len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = batch[-1] is None
+                if stop:
+                    batch.pop()
+                if batch:
+                    self._write(batch)
+                if stop:
+                    return
+        finally:
+            # If the thread dies, let the next submit() start a new one to drain the queue.
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+    def _write(self, batch):
+        """Run batch in as few transactions as it allows; every future is resolved on return."""
+        pending = []   # (future, result, error) of calls waiting for the open transaction to commit
+        conn = None
+        index = 0
+        try:
+            for index, (future, func, args, kwargs) in enumerate(batch):
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if getattr(func, "ungrouped", False):
+                    self._commit(conn, pending)
+                    conn = None  # the call may close or replace this thread's connection
+                    try:
+                        future.set_result(func(*args, **kwargs))
+                    except Exception as e:
+                        future.set_exception(e)
+                    continue
+                if conn is None or not conn.in_transaction:
+                    conn = self.pool.connection()
+                    retry_busy(lambda: conn.execute("BEGIN IMMEDIATE"))
+                conn.execute("SAVEPOINT kpr_job")
+                conn.grouped = True
+                try:
+                    outcome = (future, func(*args, **kwargs), None)
+                except Exception as e:
+                    outcome = (future, None, e)
+                finally:
+                    conn.grouped = False
+                if conn.in_transaction:
+                    if outcome[2] is not None:
+                        conn.execute("ROLLBACK TO kpr_job")
+                    conn.execute("RELEASE kpr_job")
+                    pending.append(outcome)
+                else:
+                    # The call committed the group itself (e.g. through executescript),
+                    # so it and everything before it is already durable.
+                    pending.append(outcome)
+                    self._commit(None, pending)
+            self._commit(conn, pending)
+        except Exception as e:
+            # The group's transaction is lost: fail what it held and the call that
+            # was running, then carry on with the rest on a fresh connection.
+            try:
+                if conn is not None and conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                pass
+            self.pool.close()
+            for future, *_ in pending:
+                future.set_exception(e)
+            current = batch[index][0]
+            if not current.done() and (current.running() or current.set_running_or_notify_cancel()):
+                current.set_exception(e)
+            self._write(batch[index + 1:])
+
+    @staticmethod
+    def _commit(conn, pending):
+        """Commit conn's open transaction, if any, and resolve the calls it held."""
+        if conn is not None and conn.in_transaction:
+            conn.commit()
+        for outcome in pending:
+            _resolve(*outcome)
+        pending.clear()
+
+
+class ConnectionPool:
+    """Hands out one long-lived SQLite connection per thread for a database file."""
+
+    def __init__(self, db_path, pragmas=None):
+        self.db_path = db_path
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}
+        self._writer = None
+
+    def connection(self):
+        """Return the calling thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    def _open(self):
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        # Connections never leave their owning thread; check_same_thread is
+        # disabled only so close_all() and _prune() can tear them down at shutdown.
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=Connection,
+                               cached_statements=CACHED_STATEMENTS, isolation_level="IMMEDIATE")
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        thread = threading.current_thread()
+        with self._lock:
+            self._prune()
+            self._connections[thread] = conn
+        return conn
+
+    def _prune(self):
+        """Close connections whose owning thread has exited."""
+        for thread in [t for t in self._connections if not t.is_alive()]:
+            self._connections.pop(thread).close()
+
+    def writer(self):
+        """Return the pool's WriterQueue, creating it on first use."""
+        with self._lock:
+            if self._writer is None:
+                self._writer = WriterQueue(self)
+            return self._writer
+
+    def close(self):
+        """Close the calling thread's connection; it reopens lazily on next use.
+
+        Other threads' connections are left alone, so one store closing does
+        not pull connections out from under AsyncKpr workers, the daemon or
+        the writer queue.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if self._connections.get(threading.current_thread()) is conn:
+                del self._connections[threading.current_thread()]
+        conn.close()
+
+    def close_all(self):
+        """Stop the writer queue and close every thread's connection, for shutdown.
+
+        No other thread may be using the pool while this runs; connections
+        reopen lazily on next use.
+        """
+        if self._writer is not None:
+            self._writer.close()
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+            self._local = threading.local()
+        for conn in connections:
+            conn.close()
+
+
+def get_pool(db_path, pragmas=None):
+    """Return the shared pool for db_path, creating it if needed."""
+    key = os.path.abspath(db_path) if db_path != ":memory:" else db_path
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(db_path, pragmas)
+        return pool
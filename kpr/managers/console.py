@@ -0,0 +1,12 @@
+# printy and rich together take well over 100ms to import, so they are only
+# loaded the first time something is actually printed or prompted for.
+
+
+def printy(*args, **kwargs):
+    from printy import printy as _printy
+    return _printy(*args, **kwargs)
+
+
+def inputy(*args, **kwargs):
+    from printy import inputy as _inputy
+    return _inputy(*args, **kwargs)
@@ -0,0 +1,293 @@
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+import types
+
+# Resident kpr process. The daemon opens the stores once and keeps their
+# connections, prepared statements and caches warm on a fixed set of worker
+# threads. Clients talk to it over a Unix domain socket, one JSON object
+# per line:
+#
+#   {"id": 1, "store": "notes", "method": "search_notes", "args": ["milk"]}
+#   -> {"id": 1, "result": [[3, "shopping", "milk, eggs", "2024-08-29 10:12:00"]]}
+#
+# A line holding a JSON array is a batch: its calls run together and one
+# array of responses comes back. Clients may also pipeline by writing
+# several lines before reading. Responses always come back in request order.
+#
+# This module is imported by the thin client, so the stores are only
+# imported when a daemon is started.
+
+SOCKET_PATH = os.environ.get("KPR_SOCKET") or os.path.join(os.path.expanduser("~"), "kpr_db", "kpr.sock")
+# The data methods each store serves. Maintenance (backup, restore, vacuum,
+# archiving, sync files, reindexing) is left to the kpr CLI: it takes file
+# paths or manages its own transactions and connections.
+METHODS = {
+    "notes": frozenset({
+        "add_note", "add_notes_bulk", "list_notes", "iter_notes", "get_note_by_id", "search_notes",
+        "search_notes_fts", "update_note_by_id", "delete_note_by_id", "delete_notes_by_ids"}),
+    "todos": frozenset({
+        "add_todo", "add_todos_bulk", "list_todos", "iter_todos", "get_todo_by_id", "search_todos",
+        "search_todos_fts", "update_todo_by_id", "delete_todo_by_id", "delete_todos_by_ids",
+        "mark_completed", "mark_completed_by_id", "list_completed_todos", "iter_completed_todos",
+        "delete_completed_todos_by_ids"}),
+    "hours": frozenset({
+        "set_total_hours", "log_hours", "log_hours_bulk", "view_hours", "iter_hours", "get_hours_by_id",
+        "update_hours_by_id", "delete_hours_by_id", "delete_hours_by_ids", "remaining_hours",
+        "totals_by_job", "totals_by_period"}),
+    "calendar": frozenset({
+        "add_appointment", "add_appointments_bulk", "list_appointments", "iter_appointments",
+        "view_appointments", "get_appointment_by_id", "update_appointment_by_id",
+        "delete_appointment_by_id", "delete_appointments_by_ids"}),
+}
+STORES = tuple(METHODS)
+
+
+class DaemonError(Exception):
+    """An error reported by the daemon for one request."""
+
+
+def _error(request_id, exc):
+    return {"id": request_id, "error": str(exc), "type": type(exc).__name__}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = _error(None, e)
+            else:
+                if isinstance(request, list):
+                    response = self.server.run_batch(request)
+                else:
+                    response = self.server.run_batch([request])[0]
+            self.wfile.write(json.dumps(response, default=str).encode() + b"\n")
+
+
+class KprDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves store calls on socket_path until shutdown() or a shutdown request.
+
+    Each client connection gets a handler thread, but the calls themselves
+    run on long-lived worker threads, each with its own connection: reads
+    on a small pool, and writes on the database's WriterQueue, which commits
+    the writes of all clients in groups.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path=SOCKET_PATH, db_path=None, readers=4, cache=True):
+        from concurrent.futures import ThreadPoolExecutor
+        from .stores import DB_PATH, READ_PREFIXES, NoteStore, ToDoStore, HourStore, CalendarStore
+
+        db_path = db_path or DB_PATH
+        self.read_prefixes = READ_PREFIXES
+        self.readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="kpr-reader")
+        self.stores = dict(zip(STORES, (NoteStore(db_path), ToDoStore(db_path),
+                                        HourStore(db_path), CalendarStore(db_path))))
+        if cache:
+            for store in self.stores.values():
+                store.enable_cache()
+        self.socket_path = socket_path
+        self.started = time.time()
+        self.requests = 0
+
+        if os.path.exists(socket_path):
+            if is_running(socket_path):
+                raise RuntimeError(f"A kpr daemon is already listening on {socket_path}")
+            os.unlink(socket_path)  # left behind by a daemon that did not exit cleanly
+        # Only this user may connect: the socket (and its directory, if new) is
+        # created private rather than tightened after bind, when a client could
+        # already have connected.
+        umask = os.umask(0o077)
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+            super().__init__(socket_path, _Handler)
+        finally:
+            os.umask(umask)
+        os.chmod(socket_path, 0o600)
+
+    def run_batch(self, requests):
+        """Run requests concurrently where they can be; return their responses in order."""
+        futures = []
+        for request in requests:
+            try:
+                future = self._submit(request)
+            except Exception as e:
+                future = e
+            futures.append((request, future))
+        responses = []
+        for request, future in futures:
+            request_id = request.get("id") if isinstance(request, dict) else None
+            try:
+                if isinstance(future, Exception):
+                    raise future
+                responses.append({"id": request_id, "result": future.result()})
+            except Exception as e:
+                responses.append(_error(request_id, e))
+        self.requests += len(requests)
+        return responses
+
+    def _submit(self, request):
+        op = request.get("op")
+        if op is not None:
+            return self._control(op)
+        store = self.stores.get(request.get("store"))
+        if store is None:
+            raise DaemonError(f"Unknown store {request.get('store')!r}; expected one of {', '.join(STORES)}")
+        name = request.get("method")
+        if name not in METHODS[request["store"]]:
+            raise DaemonError(f"Unknown method {name!r} for store {request['store']!r}")
+        method = getattr(store, name)
+        args, kwargs = request.get("args") or (), request.get("kwargs") or {}
+
+        def job():
+            result = method(*args, **kwargs)
+            # Generators must be drained on the worker thread that owns the cursor.
+            return list(result) if isinstance(result, types.GeneratorType) else result
+
+        if name.startswith(self.read_prefixes):
+            return self.readers.submit(job)
+        return store.submit(job)
+
+    def _control(self, op):
+        from concurrent.futures import Future
+
+        future = Future()
+        if op == "ping":
+            future.set_result("pong")
+        elif op == "stats":
+            future.set_result({"pid": os.getpid(), "uptime": round(time.time() - self.started, 3),
+                               "requests": self.requests, "cache": self.stores["notes"].cache_stats()})
+        elif op == "shutdown":
+            # shutdown() waits for serve_forever(), so it cannot run on a handler thread.
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            future.set_result(True)
+        else:
+            raise DaemonError(f"Unknown op {op!r}")
+        return future
+
+    def server_close(self):
+        super().server_close()
+        self.readers.shutdown()
+        self.stores["notes"].close_all()  # the stores share one pool
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def serve(socket_path=SOCKET_PATH, db_path=None, readers=4, cache=True):
+    """Run a daemon in the foreground until SIGTERM, SIGINT or a shutdown request."""
+    server = KprDaemon(socket_path, db_path, readers, cache)
+    stop = lambda signum, frame: threading.Thread(target=server.shutdown, daemon=True).start()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+class Client:
+    """Connection to a running daemon. Methods raise DaemonError for failed calls."""
+
+    def __init__(self, socket_path=SOCKET_PATH, timeout=None):
+        self.socket_path = socket_path
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(socket_path)
+        self._file = self._sock.makefile("rwb")
+        self._next_id = 0
+
+    def _request(self, payload):
+        self._file.write(json.dumps(payload).encode() + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("The kpr daemon closed the connection")
+        return json.loads(line)
+
+    @staticmethod
+    def _result(response):
+        if "error" in response:
+            raise DaemonError(f"{response['type']}: {response['error']}")
+        return response["result"]
+
+    def call(self, store, method, *args, **kwargs):
+        """Call store.method(*args, **kwargs) in the daemon and return its result."""
+        self._next_id += 1
+        return self._result(self._request({"id": self._next_id, "store": store, "method": method,
+                                           "args": args, "kwargs": kwargs}))
+
+    def batch(self, calls):
+        """Run (store, method, args, kwargs) calls in one round trip; return their results in order.
+
+        Reads in the batch run in parallel. If any call fails, DaemonError
+        is raised for the first failure after all of them have finished.
+        """
+        requests = []
+        for store, method, *rest in calls:
+            args = rest[0] if rest else ()
+            kwargs = rest[1] if len(rest) > 1 else {}
+            self._next_id += 1
+            requests.append({"id": self._next_id, "store": store, "method": method,
+                             "args": args, "kwargs": kwargs})
+        return [self._result(response) for response in self._request(requests)]
+
+    def pipeline(self, requests):
+        """Send requests (dicts, or JSON lines as str) without waiting for each answer; yield the raw responses in order.
+
+        Requests are written from a helper thread so neither side stalls on
+        a full socket buffer.
+        """
+        lines = [(request if isinstance(request, str) else json.dumps(request)).encode() + b"\n"
+                 for request in requests]
+
+        def send():
+            self._file.writelines(lines)
+            self._file.flush()
+
+        writer = threading.Thread(target=send, daemon=True)
+        writer.start()
+        for _ in lines:
+            line = self._file.readline()
+            if not line:
+                raise ConnectionError("The kpr daemon closed the connection")
+            yield json.loads(line)
+        writer.join()
+
+    def ping(self):
+        return self._result(self._request({"op": "ping"}))
+
+    def stats(self):
+        return self._result(self._request({"op": "stats"}))
+
+    def shutdown(self):
+        return self._result(self._request({"op": "shutdown"}))
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def is_running(socket_path=SOCKET_PATH):
+    """Return True if a daemon answers on socket_path."""
+    try:
+        with Client(socket_path, timeout=1.0) as client:
+            return client.ping() == "pong"
+    except (OSError, ValueError):
+        return False
@@ -0,0 +1,109 @@
+import re
+from datetime import datetime
+
+# Canonical storage formats. ISO-8601 text sorts chronologically, so range
+# filters and ORDER BY on these columns can be answered from an index.
+DATE_FORMAT = "%Y-%m-%d"
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+TIME_FORMAT = "%H:%M"
+
+_DATE_INPUTS = (
+    "%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%m-%d-%Y", "%Y/%m/%d",
+    "%b %d %Y", "%b %d, %Y", "%B %d %Y", "%B %d, %Y",
+)
+_DATETIME_INPUTS = (
+    "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M",
+    "%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%M", "%m/%d/%y %H:%M",
+)
+_TIME_INPUTS = ("%H:%M", "%H:%M:%S", "%I:%M %p", "%I:%M%p", "%I %p", "%I%p")
+
+# Values already in the storage format come back from strptime/strftime
+# unchanged (or, if out of range, unparsed and so unchanged too), so they
+# skip the parse; bulk inserts pass almost nothing else.
+_ISO_DATE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+_ISO_TIME = re.compile(r"[0-9]{2}:[0-9]{2}")
+
+
+def _parse(value, formats):
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def normalize_date(value):
+    """Return value as YYYY-MM-DD, or unchanged if it is not a recognisable date."""
+    if not value:
+        return value
+    value = value.strip()
+    if _ISO_DATE.fullmatch(value):
+        return value
+    parsed = _parse(value, _DATE_INPUTS) or _parse(value, _DATETIME_INPUTS)
+    return parsed.strftime(DATE_FORMAT) if parsed else value
+
+
+def normalize_datetime(value):
+    """Return value as YYYY-MM-DD HH:MM:SS, or unchanged if it is not recognisable."""
+    if not value:
+        return value
+    value = value.strip()
+    parsed = _parse(value, _DATETIME_INPUTS) or _parse(value, _DATE_INPUTS)
+    return parsed.strftime(DATETIME_FORMAT) if parsed else value
+
+
+def normalize_deadline(value):
+    """Normalize a deadline, keeping the time of day only when one was given."""
+    if not value:
+        return value
+    value = value.strip()
+    if _ISO_DATE.fullmatch(value):
+        return value
+    parsed = _parse(value, _DATETIME_INPUTS)
+    if parsed:
+        return parsed.strftime(DATETIME_FORMAT)
+    return normalize_date(value)
+
+
+def normalize_time(value):
+    """Return value as 24-hour HH:MM, or unchanged if it is not a recognisable time."""
+    if not value:
+        return value
+    value = value.strip()
+    if _ISO_TIME.fullmatch(value):
+        return value
+    parsed = _parse(value.upper(), _TIME_INPUTS)
+    return parsed.strftime(TIME_FORMAT) if parsed else value
+
+
+def today():
+    return datetime.now().strftime(DATE_FORMAT)
+
+
+def now():
+    return datetime.now().strftime(DATETIME_FORMAT)
+
+
+def register_functions(conn):
+    """Expose the normalizers to SQL so stored rows can be rewritten in place."""
+    conn.create_function("kpr_date", 1, normalize_date, deterministic=True)
+    conn.create_function("kpr_datetime", 1, normalize_datetime, deterministic=True)
+    conn.create_function("kpr_deadline", 1, normalize_deadline, deterministic=True)
+    conn.create_function("kpr_time", 1, normalize_time, deterministic=True)
+
+
+def migrate_dates(conn):
+    """Rewrite stored dates in the canonical formats and add the date range indexes."""
+    register_functions(conn)
+    conn.execute("UPDATE hours SET date = kpr_date(date)")
+    conn.execute("UPDATE appointments SET date = kpr_date(date), time = kpr_time(time)")
+    conn.execute("UPDATE todos SET deadline = kpr_deadline(deadline), timestamp = kpr_datetime(timestamp)")
+    conn.execute('''UPDATE completed_todos
+                    SET deadline = kpr_deadline(deadline),
+                        timestamp = kpr_datetime(timestamp),
+                        completed_at = kpr_datetime(completed_at)''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_hours_date ON hours (date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_hours_job_date ON hours (job_name, date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_appointments_date_time ON appointments (date, time)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_todos_deadline ON todos (deadline)")
@@ -1,86 +1,39 @@
-import os
-import sqlite3
-from printy import printy, inputy
-from rich.console import Console
-from rich.table import Table
-from datetime import datetime
-import uuid
-
-DB_PATH = os.path.join(os.path.expanduser("~"), "kpr_db", "kpr.db")
-
-class DatabaseManager:
+from .console import printy, inputy
+from .stores import DB_PATH, DatabaseManager, NoteStore, ToDoStore, HourStore, CalendarStore
+from .render import Column, get_console, render_table
+
+NOTE_COLUMNS = (Column("ID", 12, "dim"), Column("Name", 30), Column("Content", 50), Column("Timestamp", 20))
+TODO_COLUMNS = (Column("ID", 12, "dim"), Column("Content", 50), Column("Deadline", 20, empty="No deadline"),
+                Column("Timestamp", 20))
+COMPLETED_TODO_COLUMNS = (Column("ID", 12, "dim"), Column("Content", 50), Column("Deadline", 20, empty="No deadline"),
+                          Column("Created At", 20), Column("Completed At", 20))
+HOUR_COLUMNS = (Column("ID", 12, "dim"), Column("Job Name", 30), Column("Hours Worked", 20), Column("Date", 20))
+APPOINTMENT_COLUMNS = (Column("ID", 12, "dim"), Column("Title", 30), Column("Date", 20),
+                       Column("Time", 15, empty="All Day"), Column("Description", 40, empty="No description"))
+
+# Interactive CLI managers: each wraps the headless store of the same domain
+# with console output, prompts and rich tables.
+
+class NoteManager(NoteStore):
     def __init__(self, db_path=DB_PATH):
-        self.db_path = db_path
-        self._initialize_db()
-
-    def _initialize_db(self):
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''CREATE TABLE IF NOT EXISTS notes (
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                uuid TEXT UNIQUE,
-                                name TEXT NOT NULL,
-                                content TEXT NOT NULL,
-                                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                            )''')
-            conn.execute('''CREATE TABLE IF NOT EXISTS todos (
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                uuid TEXT UNIQUE,
-                                content TEXT NOT NULL,
-                                deadline TEXT,
-                                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                            )''')
-            conn.execute('''CREATE TABLE IF NOT EXISTS completed_todos (
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                uuid TEXT UNIQUE,
-                                content TEXT NOT NULL,
-                                deadline TEXT,
-                                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                                completed_at DATETIME NOT NULL
-                            )''')
-            conn.execute('''CREATE TABLE IF NOT EXISTS hours (
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                uuid TEXT UNIQUE,
-                                job_name TEXT NOT NULL,
-                                hours_worked REAL NOT NULL,
-                                date TEXT NOT NULL
-                            )''')
-            conn.execute('''CREATE TABLE IF NOT EXISTS appointments (
-                                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                                uuid TEXT UNIQUE,
-                                title TEXT NOT NULL,
-                                date TEXT NOT NULL,
-                                time TEXT,
-                                description TEXT
-                            )''')
-            conn.execute('''CREATE TABLE IF NOT EXISTS service_hours (
-                                id INTEGER PRIMARY KEY,
-                                total_hours REAL NOT NULL,
-                                remaining_hours REAL NOT NULL
-                            )''')
-
-class NoteManager(DatabaseManager):
-    def __init__(self):
-        super().__init__()
+        super().__init__(db_path)
 
     def add_note(self, name, content):
-        note_uuid = str(uuid.uuid4())
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
-                INSERT INTO notes (uuid, name, content, timestamp)
-                VALUES (?, ?, ?, ?)
-            ''', (note_uuid, name, content, timestamp))
+        note_id = super().add_note(name, content)
         printy(f"Note added successfully.")
+        return note_id
 
-    def search_notes(self, keyword):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute('''
-                SELECT id, name, content, timestamp
-                FROM notes
-                WHERE name LIKE ? OR content LIKE ?
-            ''', ('%' + keyword + '%', '%' + keyword + '%'))
-            return cursor.fetchall()
+    def add_notes_bulk(self, notes):
+        count = super().add_notes_bulk(notes)
+        printy(f"{count} notes added successfully.")
+        return count
+
+    def rebuild_search_index(self):
+        if super().rebuild_search_index():
+            printy("Notes search index rebuilt.", 'c')
+            return True
+        printy("Full-text search is not available in this SQLite build.", 'y')
+        return False
 
     def update_note_by_index(self, keyword):
         matches = self.search_notes(keyword)
@@ -95,21 +48,11 @@ class NoteManager(DatabaseManager):
             printy("No matches found.", 'y')
 
     def update_note_by_id(self, note_id, new_name=None, new_content=None):
-        with sqlite3.connect(self.db_path) as conn:
-            current_note = self.get_note_by_id(note_id)
-            if not current_note:
-                printy(f"No note found with ID: {note_id}", 'y')
-                return
-
-            new_name = new_name if new_name else current_note[1]
-            new_content = new_content if new_content else current_note[2]
-
-            conn.execute('''
-                UPDATE notes
-                SET name = ?, content = ?, timestamp = ?
-                WHERE id = ?
-            ''', (new_name, new_content, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), note_id))
+        if not super().update_note_by_id(note_id, new_name, new_content):
+            printy(f"No note found with ID: {note_id}", 'y')
+            return False
         printy(f"Note ID {note_id} updated successfully.", 'c')
+        return True
 
     def delete_note_by_index(self, keyword):
         matches = self.search_notes(keyword)
@@ -122,60 +65,35 @@ class NoteManager(DatabaseManager):
             printy("No matches found.", 'Br')
 
     def delete_note_by_id(self, note_id):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
-                DELETE FROM notes WHERE id = ?
-            ''', (note_id,))
+        if not super().delete_note_by_id(note_id):
+            printy(f"No note found with ID: {note_id}", 'y')
+            return False
         printy(f"Note ID {note_id} deleted successfully.", 'c')
+        return True
 
-    def list_notes(self):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute('''
-                SELECT id, name, content, timestamp FROM notes
-            ''')
-            return cursor.fetchall()
-
-    def get_note_by_id(self, note_id):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute('''
-                SELECT id, name, content, timestamp FROM notes WHERE id = ?
-            ''', (note_id,))
-            return cursor.fetchone()
-
-    def pretty_print_notes(self, notes):
-        console = Console()
-        table = Table(show_header=True, header_style="bold magenta")
-        table.add_column("ID", style="dim", width=12)
-        table.add_column("Name", width=30)
-        table.add_column("Content", width=50)
-        table.add_column("Timestamp", width=20)
+    def pretty_print_notes(self, notes, **options):
+        return render_table(notes, NOTE_COLUMNS, **options)
 
-        for note in notes:
-            table.add_row(str(note[0]), note[1], note[2], note[3])
-
-        console.print(table)
-
-class ToDoManager(DatabaseManager):
-    def __init__(self):
-        super().__init__()
+class ToDoManager(ToDoStore):
+    def __init__(self, db_path=DB_PATH):
+        super().__init__(db_path)
 
     def add_todo(self, content, deadline=None):
-        todo_uuid = str(uuid.uuid4())
-        timestamp = datetime.now().strftime("%m/%d/%Y %H:%M:%S")
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("INSERT INTO todos (uuid, content, deadline, timestamp) VALUES (?, ?, ?, ?)",
-                         (todo_uuid, content, deadline, timestamp))
+        todo_id = super().add_todo(content, deadline)
         printy(f"To-Do added successfully.", 'c')
+        return todo_id
 
-    def search_todos(self, keyword):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT id, content, deadline, timestamp FROM todos WHERE content LIKE ?", ('%' + keyword + '%',))
-            return cursor.fetchall()
+    def add_todos_bulk(self, todos):
+        count = super().add_todos_bulk(todos)
+        printy(f"{count} to-dos added successfully.", 'c')
+        return count
 
-    def list_todos(self):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT id, content, deadline, timestamp FROM todos")
-            return cursor.fetchall()
+    def rebuild_search_index(self):
+        if super().rebuild_search_index():
+            printy("To-do search index rebuilt.", 'c')
+            return True
+        printy("Full-text search is not available in this SQLite build.", 'y')
+        return False
 
     def update_todo_by_index(self, keyword):
         matches = self.search_todos(keyword)
@@ -184,18 +102,17 @@ class ToDoManager(DatabaseManager):
             index = int(inputy("Select the to-do by index to update: ", 'y')) - 1
             todo_id = matches[index][0]
             new_content = inputy("Enter the new content for the to-do: ", 'y')
-            new_deadline = input("Enter the new deadline (optional): ", 'y')
+            new_deadline = inputy("Enter the new deadline (optional): ", 'y')
             self.update_todo_by_id(todo_id, new_content, new_deadline)
         else:
             printy("No matches found.", 'r')
 
     def update_todo_by_id(self, todo_id, new_content=None, new_deadline=None):
-        with sqlite3.connect(self.db_path) as conn:
-            if new_content:
-                conn.execute("UPDATE todos SET content = ? WHERE id = ?", (new_content, todo_id))
-            if new_deadline:
-                conn.execute("UPDATE todos SET deadline = ? WHERE id = ?", (new_deadline, todo_id))
+        if not super().update_todo_by_id(todo_id, new_content, new_deadline):
+            printy(f"To-Do ID {todo_id} not found.", 'r')
+            return False
         printy(f"To-Do ID {todo_id} updated successfully.", 'c')
+        return True
 
     def delete_todo_by_index(self, keyword):
         matches = self.search_todos(keyword)
@@ -208,9 +125,11 @@ class ToDoManager(DatabaseManager):
             printy("No matches found.", 'r')
 
     def delete_todo_by_id(self, todo_id):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("DELETE FROM todos WHERE id = ?", (todo_id,))
+        if not super().delete_todo_by_id(todo_id):
+            printy(f"To-Do ID {todo_id} not found.", 'r')
+            return False
         printy(f"To-Do ID {todo_id} deleted successfully.", 'c')
+        return True
 
     def mark_completed_by_index(self, keyword):
         matches = self.search_todos(keyword)
@@ -223,80 +142,50 @@ class ToDoManager(DatabaseManager):
             printy("No matches found.", 'r')
 
     def mark_completed_by_id(self, todo_id):
-        with sqlite3.connect(self.db_path) as conn:
-            todo = conn.execute("SELECT id, content, deadline, timestamp FROM todos WHERE id = ?", (todo_id,)).fetchone()
-            if todo:
-                conn.execute("INSERT INTO completed_todos (uuid, content, deadline, timestamp, completed_at) VALUES (?, ?, ?, ?, ?)",
-                             (str(uuid.uuid4()), todo[1], todo[2], todo[3], datetime.now().strftime("%m/%d/%Y %H:%M:%S")))
-                conn.execute("DELETE FROM todos WHERE id = ?", (todo_id,))
-                printy(f"To-Do ID {todo_id} marked as completed.", 'c')
-            else:
-                printy(f"To-Do ID {todo_id} not found.", 'r')
-
-    def list_completed_todos(self):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT id, content, deadline, timestamp, completed_at FROM completed_todos")
-            return cursor.fetchall()
-
-    def pretty_print_todos(self, todos):
-        console = Console()
-        table = Table(show_header=True, header_style="bold magenta")
-        table.add_column("ID", style="dim", width=12)
-        table.add_column("Content", width=50)
-        table.add_column("Deadline", width=20)
-        table.add_column("Timestamp", width=20)
-
-        for todo in todos:
-            table.add_row(str(todo[0]), todo[1], todo[2] or "No deadline", todo[3])
+        if not super().mark_completed_by_id(todo_id):
+            printy(f"To-Do ID {todo_id} not found.", 'r')
+            return False
+        printy(f"To-Do ID {todo_id} marked as completed.", 'c')
+        return True
 
-        console.print(table)
+    def mark_completed(self, ids=None, keyword=None, start=None, end=None):
+        count = super().mark_completed(ids, keyword, start, end)
+        printy(f"{count} to-dos marked as completed.", 'c' if count else 'y')
+        return count
 
-    def pretty_print_completed_todos(self, todos):
-        console = Console()
-        table = Table(show_header=True, header_style="bold magenta")
-        table.add_column("ID", style="dim", width=12)
-        table.add_column("Content", width=50)
-        table.add_column("Deadline", width=20)
-        table.add_column("Created At", width=20)
-        table.add_column("Completed At", width=20)
+    def archive_completed_todos(self, before):
+        count = super().archive_completed_todos(before)
+        printy(f"{count} completed to-dos archived to {self.archive_path}.", 'c' if count else 'y')
+        return count
 
-        for todo in todos:
-            table.add_row(str(todo[0]), todo[1], todo[2] or "No deadline", todo[3], todo[4])
+    def pretty_print_todos(self, todos, **options):
+        return render_table(todos, TODO_COLUMNS, **options)
 
-        console.print(table)
+    def pretty_print_completed_todos(self, todos, **options):
+        return render_table(todos, COMPLETED_TODO_COLUMNS, **options)
 
-class HourTracker(DatabaseManager):
-    def __init__(self):
-        super().__init__()
+class HourTracker(HourStore):
+    def __init__(self, db_path=DB_PATH):
+        super().__init__(db_path)
 
     def set_total_hours(self, total_hours):
-        with sqlite3.connect(self.db_path) as conn:
-            # Update the service hours if they already exist
-            conn.execute("""
-                INSERT OR REPLACE INTO service_hours (id, total_hours, remaining_hours)
-                VALUES (1, ?, ?)
-            """, (total_hours, total_hours))
+        super().set_total_hours(total_hours)
         printy(f"Total service hours set to {total_hours}.", 'b')
 
     def log_hours(self, job_name, hours_worked, date=None):
-        hour_uuid = str(uuid.uuid4())
-        date = date or datetime.now().strftime("%m/%d/%Y")
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("INSERT INTO hours (uuid, job_name, hours_worked, date) VALUES (?, ?, ?, ?)",
-                         (hour_uuid, job_name, hours_worked, date))
-            conn.execute("UPDATE service_hours SET remaining_hours = remaining_hours - ? WHERE id = 1",
-                         (hours_worked,))
+        hour_id = super().log_hours(job_name, hours_worked, date)
         printy(f"Hours logged successfully.", 'c')
+        return hour_id
+
+    def log_hours_bulk(self, entries):
+        count = super().log_hours_bulk(entries)
+        printy(f"{count} hour entries logged successfully.", 'c')
+        return count
 
-    def view_hours(self, date=None):
-        with sqlite3.connect(self.db_path) as conn:
-            query = "SELECT id, job_name, hours_worked, date FROM hours WHERE 1=1"
-            params = []
-            if date:
-                query += " AND date = ?"
-                params.append(date)
-            cursor = conn.execute(query, params)
-            return cursor.fetchall()
+    def archive_hours(self, before):
+        count = super().archive_hours(before)
+        printy(f"{count} hour entries archived to {self.archive_path}.", 'c' if count else 'y')
+        return count
 
     def update_hours_by_index(self, keyword):
         matches = self.view_hours()
@@ -311,14 +200,11 @@ class HourTracker(DatabaseManager):
             printy("No matches found.", 'r')
 
     def update_hours_by_id(self, hour_id, new_hours, new_date=None):
-        with sqlite3.connect(self.db_path) as conn:
-            # Get current hours worked
-            old_hours = conn.execute("SELECT hours_worked FROM hours WHERE id = ?", (hour_id,)).fetchone()[0]
-            conn.execute("UPDATE hours SET hours_worked = ?, date = ? WHERE id = ?",
-                         (new_hours, new_date or datetime.now().strftime("%m/%d/%Y"), hour_id))
-            conn.execute("UPDATE service_hours SET remaining_hours = remaining_hours + ? - ? WHERE id = 1",
-                         (old_hours, new_hours))
+        if not super().update_hours_by_id(hour_id, new_hours, new_date):
+            printy(f"Hours ID {hour_id} not found.", 'r')
+            return False
         printy(f"Hours ID {hour_id} updated successfully.", 'c')
+        return True
 
     def delete_hours_by_index(self, keyword):
         matches = self.view_hours()
@@ -331,57 +217,35 @@ class HourTracker(DatabaseManager):
             printy("No matches found.", 'r')
 
     def delete_hours_by_id(self, hour_id):
-        with sqlite3.connect(self.db_path) as conn:
-            # Get current hours worked before deletion
-            old_hours = conn.execute("SELECT hours_worked FROM hours WHERE id = ?", (hour_id,)).fetchone()[0]
-            conn.execute("DELETE FROM hours WHERE id = ?", (hour_id,))
-            conn.execute("UPDATE service_hours SET remaining_hours = remaining_hours + ? WHERE id = 1",
-                         (old_hours,))
+        if not super().delete_hours_by_id(hour_id):
+            printy(f"Hours ID {hour_id} not found.", 'r')
+            return False
         printy(f"Hours ID {hour_id} deleted successfully.", 'c')
+        return True
 
     def show_remaining_hours(self):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT remaining_hours FROM service_hours WHERE id = 1")
-            result = cursor.fetchone()
-            if result:
-                remaining_hours = result[0]
-                printy(f"Remaining service hours: {remaining_hours}", 'c')
-            else:
-                printy("No service hours set yet.", 'y')
-
-    def pretty_print_hours(self, hours):
-        console = Console()
-        table = Table(show_header=True, header_style="bold magenta")
-        table.add_column("ID", style="dim", width=12)
-        table.add_column("Job Name", width=30)
-        table.add_column("Hours Worked", width=20)
-        table.add_column("Date", width=20)
-
-        for hour in hours:
-            table.add_row(str(hour[0]), hour[1], str(hour[2]), hour[3])
+        remaining_hours = self.remaining_hours()
+        if remaining_hours is not None:
+            printy(f"Remaining service hours: {remaining_hours}", 'c')
+        else:
+            printy("No service hours set yet.", 'y')
 
-        console.print(table)
+    def pretty_print_hours(self, hours, **options):
+        return render_table(hours, HOUR_COLUMNS, **options)
 
-class CalendarManager(DatabaseManager):
-    def __init__(self):
-        super().__init__()
+class CalendarManager(CalendarStore):
+    def __init__(self, db_path=DB_PATH):
+        super().__init__(db_path)
 
     def add_appointment(self, title, date, time=None, description=None):
-        appointment_uuid = str(uuid.uuid4())
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("INSERT INTO appointments (uuid, title, date, time, description) VALUES (?, ?, ?, ?, ?)",
-                         (appointment_uuid, title, date, time, description))
+        appointment_id = super().add_appointment(title, date, time, description)
         printy(f"Appointment added successfully.", 'c')
+        return appointment_id
 
-    def view_appointments(self, date=None):
-        with sqlite3.connect(self.db_path) as conn:
-            query = "SELECT id, title, date, time, description FROM appointments WHERE 1=1"
-            params = []
-            if date:
-                query += " AND date = ?"
-                params.append(date)
-            cursor = conn.execute(query, params)
-            return cursor.fetchall()
+    def add_appointments_bulk(self, appointments):
+        count = super().add_appointments_bulk(appointments)
+        printy(f"{count} appointments added successfully.", 'c')
+        return count
 
     def update_appointment_by_index(self, keyword):
         matches = self.view_appointments()
@@ -398,16 +262,11 @@ class CalendarManager(DatabaseManager):
             printy("No matches found.", 'r')
 
     def update_appointment_by_id(self, appointment_id, new_title=None, new_date=None, new_time=None, new_description=None):
-        with sqlite3.connect(self.db_path) as conn:
-            if new_title:
-                conn.execute("UPDATE appointments SET title = ? WHERE id = ?", (new_title, appointment_id))
-            if new_date:
-                conn.execute("UPDATE appointments SET date = ? WHERE id = ?", (new_date, appointment_id))
-            if new_time:
-                conn.execute("UPDATE appointments SET time = ? WHERE id = ?", (new_time, appointment_id))
-            if new_description:
-                conn.execute("UPDATE appointments SET description = ? WHERE id = ?", (new_description, appointment_id))
+        if not super().update_appointment_by_id(appointment_id, new_title, new_date, new_time, new_description):
+            printy(f"Appointment ID {appointment_id} not found.", 'r')
+            return False
         printy(f"Appointment ID {appointment_id} updated successfully.", 'c')
+        return True
 
     def delete_appointment_by_index(self, keyword):
         matches = self.view_appointments()
@@ -420,51 +279,45 @@ class CalendarManager(DatabaseManager):
             printy("No matches found.", 'r')
 
     def delete_appointment_by_id(self, appointment_id):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("DELETE FROM appointments WHERE id = ?", (appointment_id,))
+        if not super().delete_appointment_by_id(appointment_id):
+            printy(f"Appointment ID {appointment_id} not found.", 'r')
+            return False
         printy(f"Appointment ID {appointment_id} deleted successfully.", 'c')
+        return True
 
-    def list_appointments(self):
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT id, title, date, time, description FROM appointments")
-            return cursor.fetchall()
-
-    def pretty_print_appointments(self, appointments):
-        console = Console()
-        table = Table(show_header=True, header_style="bold magenta")
-        table.add_column("ID", style="dim", width=12)
-        table.add_column("Title", width=30)
-        table.add_column("Date", width=20)
-        table.add_column("Time", width=15)
-        table.add_column("Description", width=40)
-
-        for appointment in appointments:
-            table.add_row(str(appointment[0]), appointment[1], appointment[2], appointment[3] or "All Day", appointment[4] or "No description")
-
-        console.print(table)
+    def pretty_print_appointments(self, appointments, **options):
+        return render_table(appointments, APPOINTMENT_COLUMNS, **options)
 
 class Formatter:
-    def __init__(self):
-        self.console = Console()
+    def __init__(self, plain=None, pager=False):
+        self.plain = plain
+        self.pager = pager
 
-    def format_grid(self, data, headers):
-        """Formats a grid (table) with the provided data and headers."""
-        table = Table(show_header=True, header_style="bold magenta")
-        for header in headers:
-            table.add_column(header)
+    @property
+    def console(self):
+        return get_console()
 
-        for row in data:
-            table.add_row(*[str(cell) for cell in row])
+    def format_grid(self, data, headers, **options):
+        """Formats a grid (table) with the provided data and headers.
 
-        self.console.print(table)
+        data may be any iterable of rows, e.g. a store's iter_* generator; it
+        is printed in chunks. See render.render_table for the options.
+        """
+        options.setdefault('plain', self.plain)
+        options.setdefault('pager', self.pager)
+        return render_table(data, headers, **options)
 
     def pretty_print(self, title, content):
         """Pretty prints content within a titled panel."""
+        from rich.panel import Panel
+
         panel = Panel(content, title=title, title_align="left", border_style="green")
         self.console.print(panel)
 
     def format_comparison(self, old_data, new_data, headers):
         """Formats a comparison grid showing old vs new data."""
+        from rich.table import Table
+
         table = Table(show_header=True, header_style="bold magenta")
         for header in headers, :
             table.add_column(header)
@@ -476,6 +329,9 @@ class Formatter:
 
     def format_layout(self, panels):
         """Formats a multi-panel layout."""
+        from rich.layout import Layout
+        from rich.panel import Panel
+
         layout = Layout()
         for title, content in panels.items():
             panel = Panel(content, title=title, title_align="left", border_style="blue")
@@ -0,0 +1,95 @@
+from contextlib import contextmanager
+
+# Trigger-maintained aggregates over the hours table. hours_daily keeps one
+# running total per (job, day); week, month and year totals roll up from it,
+# so reports touch at most one row per job per day instead of every entry.
+# The same triggers keep service_hours.remaining_hours in step with hours,
+# which makes it correct under concurrent writers without any read-modify-write
+# in Python.
+
+# SQL expressions mapping hours_daily.date to each reporting period. Weeks
+# run Monday to Sunday and are labelled by their Monday, so a week spanning
+# New Year stays in one group.
+PERIODS = {
+    "day": "date",
+    "week": "date(date, '-6 days', 'weekday 1')",
+    "month": "substr(date, 1, 7)",
+    "year": "substr(date, 1, 4)",
+}
+
+_ADD = '''
+    INSERT INTO hours_daily (job_name, date, hours, entries)
+    VALUES (new.job_name, new.date, new.hours_worked, 1)
+    ON CONFLICT (job_name, date) DO UPDATE
+        SET hours = hours + excluded.hours, entries = entries + 1;
+    UPDATE service_hours SET remaining_hours = remaining_hours - new.hours_worked WHERE id = 1;
+'''
+
+_REMOVE = '''
+    UPDATE hours_daily SET hours = hours - old.hours_worked, entries = entries - 1
+        WHERE job_name = old.job_name AND date = old.date;
+    DELETE FROM hours_daily WHERE job_name = old.job_name AND date = old.date AND entries <= 0;
+    UPDATE service_hours SET remaining_hours = remaining_hours + old.hours_worked WHERE id = 1;
+'''
+
+# Rows moved to the archive stay counted: deletes made while the archiving
+# flag is set skip the ledger and service hours (see archive.archiving).
+_LIVE_DELETE = "NOT EXISTS (SELECT 1 FROM kpr_flags WHERE name = 'archiving')"
+
+# Bulk inserts made while the bulk_hours flag is set skip the per-row insert
+# trigger; bulk_hours() applies their totals in one statement per table.
+_ROW_INSERT = "NOT EXISTS (SELECT 1 FROM kpr_flags WHERE name = 'bulk_hours')"
+
+
+def create_hours_ledger(conn):
+    """Create hours_daily and its triggers, and backfill it from existing hours."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS hours_daily (
+                        job_name TEXT NOT NULL,
+                        date TEXT NOT NULL,
+                        hours REAL NOT NULL,
+                        entries INTEGER NOT NULL,
+                        PRIMARY KEY (job_name, date)
+                    ) WITHOUT ROWID''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_hours_daily_date ON hours_daily (date)")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS hours_ledger_ai AFTER INSERT ON hours BEGIN {_ADD} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS hours_ledger_ad AFTER DELETE ON hours BEGIN {_REMOVE} END")
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS hours_ledger_au
+                     AFTER UPDATE OF job_name, hours_worked, date ON hours BEGIN {_REMOVE} {_ADD} END''')
+    conn.execute("DELETE FROM hours_daily")
+    conn.execute('''INSERT INTO hours_daily (job_name, date, hours, entries)
+                    SELECT job_name, date, SUM(hours_worked), COUNT(*) FROM hours GROUP BY job_name, date''')
+
+
+def guard_ledger_deletes(conn):
+    """Recreate the delete trigger so archiving does not give hours back."""
+    conn.execute("DROP TRIGGER IF EXISTS hours_ledger_ad")
+    conn.execute(f"CREATE TRIGGER hours_ledger_ad AFTER DELETE ON hours WHEN {_LIVE_DELETE} BEGIN {_REMOVE} END")
+
+
+def guard_ledger_inserts(conn):
+    """Recreate the insert trigger so bulk inserts can apply their totals in one pass."""
+    conn.execute("DROP TRIGGER IF EXISTS hours_ledger_ai")
+    conn.execute(f"CREATE TRIGGER hours_ledger_ai AFTER INSERT ON hours WHEN {_ROW_INSERT} BEGIN {_ADD} END")
+
+
+@contextmanager
+def bulk_hours(conn):
+    """Add the hours inserted in the enclosing block to the ledger with one aggregated update.
+
+    Must run inside a transaction. AUTOINCREMENT ids only grow, so the
+    block's rows are exactly those past the largest id seen on entry.
+    """
+    last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM hours").fetchone()[0]
+    conn.execute("INSERT OR IGNORE INTO kpr_flags (name) VALUES ('bulk_hours')")
+    try:
+        yield
+    finally:
+        conn.execute("DELETE FROM kpr_flags WHERE name = 'bulk_hours'")
+    conn.execute('''INSERT INTO hours_daily (job_name, date, hours, entries)
+                    SELECT job_name, date, SUM(hours_worked), COUNT(*) FROM hours WHERE id > ?
+                    GROUP BY job_name, date
+                    ON CONFLICT (job_name, date) DO UPDATE
+                        SET hours = hours + excluded.hours, entries = entries + excluded.entries''', (last_id,))
+    conn.execute('''UPDATE service_hours SET remaining_hours = remaining_hours -
+                        (SELECT COALESCE(SUM(hours_worked), 0) FROM hours WHERE id > ?)
+                    WHERE id = 1''', (last_id,))
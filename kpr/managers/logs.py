@@ -1,39 +1,121 @@
+import atexit
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+import time
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
+
+# Handlers and the queue listener installed on each named logger, so that
+# constructing Logger again reconfigures it instead of stacking duplicates.
+_installed = {}
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class _DeferredQueueHandler(QueueHandler):
+    """Enqueue records untouched; the listener thread does the %-formatting."""
+
+    def prepare(self, record):
+        # QueueHandler.prepare() formats on the caller's thread so records can
+        # be pickled. They never leave this process, so skip it and keep
+        # formatting (and rotation) off the hot path.
+        return record
+
+def _stop(listener):
+    try:
+        listener.stop()
+    except AttributeError:
+        pass  # already stopped
 
 class Logger:
-    def __init__(self, log_file='/home/sohfix/logs', log_level=logging.DEBUG, max_bytes=1024*1024, backup_count=3):
-        self.logger = logging.getLogger('KPR Logger')
+    def __init__(self, log_file='/home/sohfix/logs', log_level=logging.DEBUG, max_bytes=1024*1024, backup_count=3,
+                 queued=True, json_lines=False, console=True, name='KPR Logger'):
+        """Configure the shared logger.
+
+        With queued=True (the default) log calls only enqueue the record and a
+        background thread formats it and writes the file and console output.
+        json_lines=True writes one JSON object per line instead of plain text.
+        Creating another Logger for the same name replaces the handlers added
+        by the previous one.
+        """
+        self.logger = logging.getLogger(name)
         self.logger.setLevel(log_level)
 
-        # Create a rotating file handler
-        file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count)
-        file_handler.setLevel(log_level)
+        # Create a rotating file handler; the file is opened on the first record
+        file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        handlers = [file_handler]
 
         # Create console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(log_level)
+        if console:
+            handlers.append(logging.StreamHandler())
 
         # Formatter
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(formatter)
-        console_handler.setFormatter(formatter)
+        if json_lines:
+            formatter = JsonFormatter()
+        else:
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        for handler in handlers:
+            handler.setLevel(log_level)
+            handler.setFormatter(formatter)
+
+        self._uninstall(name)
+        if queued:
+            records = queue.SimpleQueue()
+            self.listener = QueueListener(records, *handlers, respect_handler_level=True)
+            self.listener.start()
+            atexit.register(_stop, self.listener)
+            attached = [_DeferredQueueHandler(records)]
+        else:
+            self.listener = None
+            attached = handlers
 
         # Add handlers
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+        for handler in attached:
+            self.logger.addHandler(handler)
+        _installed[name] = (attached, handlers, self.listener)
+
+    @staticmethod
+    def _uninstall(name):
+        attached, handlers, listener = _installed.pop(name, ((), (), None))
+        logger = logging.getLogger(name)
+        for handler in attached:
+            logger.removeHandler(handler)
+        if listener is not None:
+            _stop(listener)
+        for handler in handlers:
+            handler.close()
+
+    def close(self):
+        """Flush queued records and detach this logger's handlers."""
+        entry = _installed.get(self.logger.name)
+        if entry is not None and entry[2] is self.listener:
+            self._uninstall(self.logger.name)
 
-    def debug(self, message):
-        self.logger.debug(message)
+    # Messages are %-style templates; args are only interpolated if the record
+    # is emitted, e.g. log.debug("query took %.1f ms", elapsed).
+    def debug(self, message, *args, **kwargs):
+        self.logger.debug(message, *args, **kwargs)
 
-    def info(self, message):
-        self.logger.info(message)
+    def info(self, message, *args, **kwargs):
+        self.logger.info(message, *args, **kwargs)
 
-    def warning(self, message):
-        self.logger.warning(message)
+    def warning(self, message, *args, **kwargs):
+        self.logger.warning(message, *args, **kwargs)
 
-    def error(self, message):
-        self.logger.error(message)
+    def error(self, message, *args, **kwargs):
+        self.logger.error(message, *args, **kwargs)
 
-    def critical(self, message):
-        self.logger.critical(message)
+    def critical(self, message, *args, **kwargs):
+        self.logger.critical(message, *args, **kwargs)
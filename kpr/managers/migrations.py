@@ -0,0 +1,125 @@
+from . import dates
+from .archive import create_archive_support
+from .ledger import create_hours_ledger, guard_ledger_deletes, guard_ledger_inserts
+from .sync import create_change_log, guard_bulk_inserts
+from .search import FTS_TABLES, fts5_available, create_fts_index
+
+# Schema migrations, applied in order. The database's PRAGMA user_version
+# records how many have run, so each one executes exactly once per database.
+# Append new migrations to the end of MIGRATIONS; never reorder or edit one
+# that has shipped.
+
+
+def _create_tables(conn):
+    conn.execute('''CREATE TABLE IF NOT EXISTS notes (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        uuid TEXT UNIQUE,
+                        name TEXT NOT NULL,
+                        content TEXT NOT NULL,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS todos (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        uuid TEXT UNIQUE,
+                        content TEXT NOT NULL,
+                        deadline TEXT,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS completed_todos (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        uuid TEXT UNIQUE,
+                        content TEXT NOT NULL,
+                        deadline TEXT,
+                        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        completed_at DATETIME NOT NULL
+                    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS hours (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        uuid TEXT UNIQUE,
+                        job_name TEXT NOT NULL,
+                        hours_worked REAL NOT NULL,
+                        date TEXT NOT NULL
+                    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS appointments (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        uuid TEXT UNIQUE,
+                        title TEXT NOT NULL,
+                        date TEXT NOT NULL,
+                        time TEXT,
+                        description TEXT
+                    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS service_hours (
+                        id INTEGER PRIMARY KEY,
+                        total_hours REAL NOT NULL,
+                        remaining_hours REAL NOT NULL
+                    )''')
+
+
+def _create_search_index(conn):
+    if fts5_available(conn):
+        for table in FTS_TABLES:
+            create_fts_index(conn, table)
+
+
+def _normalize_dates(conn):
+    dates.migrate_dates(conn)
+
+
+def _create_hours_ledger(conn):
+    create_hours_ledger(conn)
+
+
+def _create_archive_support(conn):
+    create_archive_support(conn)
+    guard_ledger_deletes(conn)
+
+
+def _create_change_log(conn):
+    create_change_log(conn)
+
+
+def _guard_ledger_inserts(conn):
+    guard_ledger_inserts(conn)
+
+
+def _guard_bulk_inserts(conn):
+    guard_bulk_inserts(conn)
+
+
+MIGRATIONS = [
+    _create_tables,
+    _create_search_index,
+    _normalize_dates,
+    _create_hours_ledger,
+    _create_archive_support,
+    _create_change_log,
+    _guard_ledger_inserts,
+    _guard_bulk_inserts,
+]
+
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Bring the database up to date, applying all pending migrations in one transaction.
+
+    A database that is already current costs a single PRAGMA read and no DDL.
+    Returns the resulting schema version.
+    """
+    version = schema_version(conn)
+    if version >= len(MIGRATIONS):
+        return version
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Re-read under the write lock in case another process migrated first.
+        version = schema_version(conn)
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+    return schema_version(conn)
@@ -0,0 +1,267 @@
+import functools
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import types
+from collections import deque
+
+# Opt-in instrumentation for the managers. While disabled (the default) the
+# hooks below cost one attribute check per call. Enable it with
+# enable_metrics() and read the numbers back with metrics.snapshot().
+
+# Upper bounds, in milliseconds, of the latency histogram buckets.
+BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, float("inf"))
+
+_whitespace = re.compile(r"\s+")
+
+
+def _bucket_label(bound):
+    return "+inf" if bound == float("inf") else f"<={bound:g}ms"
+
+
+class _Histogram:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS_MS)
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                self.buckets[i] += 1
+                break
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max, 3),
+            "buckets": {_bucket_label(b): n for b, n in zip(BUCKETS_MS, self.buckets)},
+        }
+
+
+class Metrics:
+    """Process-wide statement and method timings."""
+
+    def __init__(self):
+        self.enabled = False
+        self.slow_query_ms = 100.0
+        self.explain = False
+        self.logger = logging.getLogger('KPR Logger')
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._statements = {}
+            self._methods = {}
+            self._plans = {}
+            self._slow = deque(maxlen=100)
+
+    def record_statement(self, conn, sql, params, seconds):
+        ms = seconds * 1000
+        key = _whitespace.sub(" ", sql).strip()
+        with self._lock:
+            self._statements.setdefault(key, _Histogram()).add(ms)
+            needs_plan = self.explain and key not in self._plans
+        if needs_plan:
+            self._capture_plan(conn, key, sql, params)
+        if ms >= self.slow_query_ms:
+            with self._lock:
+                self._slow.append({"sql": key, "ms": round(ms, 3), "at": time.time()})
+            self.logger.warning("Slow query (%.1f ms): %s", ms, key)
+
+    def _capture_plan(self, conn, key, sql, params):
+        if params is None or not key.upper().startswith(("SELECT", "WITH", "UPDATE", "DELETE")):
+            plan = None
+        else:
+            try:
+                rows = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params).fetchall()
+                plan = [row[-1] for row in rows]
+            except sqlite3.Error:
+                plan = None
+        full_scan = bool(plan) and any(
+            step.startswith("SCAN ") and "USING" not in step and "VIRTUAL TABLE" not in step for step in plan)
+        with self._lock:
+            self._plans[key] = {"plan": plan, "full_scan": full_scan}
+        if full_scan:
+            self.logger.warning("Full table scan: %s | %s", key, "; ".join(plan))
+
+    def record_call(self, name, seconds):
+        with self._lock:
+            self._methods.setdefault(name, _Histogram()).add(seconds * 1000)
+
+    def snapshot(self):
+        """Return all collected metrics as plain, JSON-serialisable data."""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "slow_query_ms": self.slow_query_ms,
+                "statements": {sql: h.as_dict() for sql, h in self._statements.items()},
+                "methods": {name: h.as_dict() for name, h in self._methods.items()},
+                "plans": dict(self._plans),
+                "slow_queries": list(self._slow),
+            }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.snapshot(), **kwargs)
+
+
+metrics = Metrics()
+
+
+def enable_metrics(slow_query_ms=100.0, explain=False, logger=None):
+    """Start timing statements and manager methods.
+
+    Statements slower than slow_query_ms are logged as warnings. With
+    explain=True each distinct statement's EXPLAIN QUERY PLAN is captured
+    once and full table scans are logged. logger defaults to the shared
+    'KPR Logger' that kpr.managers.logs.Logger configures; a Logger
+    instance may be passed as well.
+    """
+    metrics.slow_query_ms = slow_query_ms
+    metrics.explain = explain
+    if logger is not None:
+        metrics.logger = getattr(logger, "logger", logger)
+    metrics.enabled = True
+    return metrics
+
+
+def disable_metrics():
+    metrics.enabled = False
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that times its statement through the fetches as well as execute().
+
+    A SELECT does most of its work as rows are fetched, so the total is
+    recorded once the rows run out or the cursor is closed; statements
+    without a result set are recorded straight away.
+    """
+
+    _statement = None   # (sql, parameters) until the timing is recorded
+    _elapsed = 0.0
+
+    def _start(self, sql, parameters):
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        self._elapsed = time.perf_counter() - start
+        self._statement = (sql, parameters)
+        if self.description is None:
+            self._record()
+        return self
+
+    def _record(self):
+        statement, self._statement = self._statement, None
+        if statement is not None:
+            metrics.record_statement(self.connection, *statement, self._elapsed)
+
+    def _fetch(self, fetch, *args):
+        if self._statement is None:
+            return fetch(*args)
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            self._elapsed += time.perf_counter() - start
+
+    def fetchone(self):
+        row = self._fetch(super().fetchone)
+        if row is None:
+            self._record()
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._fetch(super().fetchmany, size)
+        if len(rows) < size:
+            self._record()
+        return rows
+
+    def fetchall(self):
+        rows = self._fetch(super().fetchall)
+        self._record()
+        return rows
+
+    def __next__(self):
+        try:
+            return self._fetch(super().__next__)
+        except StopIteration:
+            self._record()
+            raise
+
+    def close(self):
+        self._record()
+        super().close()
+
+    def __del__(self):
+        # A cursor dropped before its last row (e.g. a fetchone() lookup) still counts.
+        self._record()
+
+
+class TimedConnection(sqlite3.Connection):
+    """sqlite3 connection that reports statement timings while metrics are enabled."""
+
+    def execute(self, sql, parameters=()):
+        if not metrics.enabled:
+            return super().execute(sql, parameters)
+        return self.cursor(TimedCursor)._start(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        if not metrics.enabled:
+            return super().executemany(sql, parameters)
+        start = time.perf_counter()
+        cursor = super().executemany(sql, parameters)
+        # The plan of a batched statement is not meaningful without one row of parameters.
+        metrics.record_statement(self, sql, None, time.perf_counter() - start)
+        return cursor
+
+
+def _timed_generator(name, generator, elapsed):
+    # Time spent in the caller between rows is not counted.
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(generator)
+            except StopIteration:
+                return
+            finally:
+                elapsed += time.perf_counter() - start
+            yield item
+    finally:
+        generator.close()
+        metrics.record_call(name, elapsed)
+
+
+def timed(name, func):
+    """Wrap func so its latency is recorded under name while metrics are enabled.
+
+    A returned generator is timed until it is exhausted or closed.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not metrics.enabled:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except BaseException:
+            metrics.record_call(name, time.perf_counter() - start)
+            raise
+        elapsed = time.perf_counter() - start
+        if isinstance(result, types.GeneratorType):
+            return _timed_generator(name, result, elapsed)
+        metrics.record_call(name, elapsed)
+        return result
+    return wrapper
@@ -0,0 +1,101 @@
+import sys
+from collections import namedtuple
+from itertools import islice
+
+# Terminal output for the CLI managers. Rows are rendered a chunk at a time
+# into small rich tables that line up under one header, so memory and the
+# time to first output stay flat however many rows are printed. Cells are
+# cut to their column width before rich lays them out. When stdout is not a
+# terminal, rows go out as tab-separated lines without touching rich.
+
+CHUNK_SIZE = 200
+MAX_CELL_WIDTH = 80
+
+# empty is shown in place of a missing value in the rich table only.
+Column = namedtuple("Column", "header width style empty", defaults=(None, None, ""))
+
+_console = None
+
+
+def get_console():
+    """Return the rich Console shared by all managers."""
+    global _console
+    if _console is None:
+        from rich.console import Console
+        _console = Console()
+    return _console
+
+
+def truncate(text, width):
+    return text if len(text) <= width else text[:max(width - 1, 0)] + "…"
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+_TSV_ESCAPES = str.maketrans("\t\n\r", "   ")
+
+
+def write_tsv(rows, headers, stream=None, chunk_size=CHUNK_SIZE * 10):
+    """Write rows as tab-separated lines, after a header line unless headers is None; return the row count."""
+    stream = stream or sys.stdout
+    if headers is not None:
+        stream.write("\t".join(headers) + "\n")
+    count = 0
+    for chunk in _chunks(rows, chunk_size):
+        stream.write("".join(
+            "\t".join("" if cell is None else str(cell).translate(_TSV_ESCAPES) for cell in row) + "\n"
+            for row in chunk))
+        count += len(chunk)
+    return count
+
+
+def render_table(rows, columns, plain=None, pager=False, chunk_size=CHUNK_SIZE, console=None):
+    """Print rows under columns (Column tuples or header strings); return the row count.
+
+    plain=None picks tab-separated output when stdout is not a terminal.
+    Columns without a width take one from the first chunk, capped at
+    MAX_CELL_WIDTH. pager=True sends the table through the system pager.
+    """
+    columns = [Column(c) if isinstance(c, str) else c for c in columns]
+    if plain is None:
+        plain = not (console.is_terminal if console is not None else sys.stdout.isatty())
+    if plain:
+        return write_tsv(rows, [c.header for c in columns], console.file if console is not None else None)
+
+    from rich import box
+    from rich.table import Table
+
+    console = console or get_console()
+    widths = [c.width for c in columns]
+    count = 0
+
+    def emit():
+        nonlocal count
+        for chunk in _chunks(rows, chunk_size):
+            cells = [["" if v is None or v == "" else str(v) for v in row] for row in chunk]
+            for i, width in enumerate(widths):
+                if width is None:
+                    widths[i] = min(max([len(columns[i].header)] + [len(row[i]) for row in cells]), MAX_CELL_WIDTH)
+            table = Table(show_header=count == 0, header_style="bold magenta", box=box.SIMPLE_HEAD,
+                          show_edge=False, pad_edge=False)
+            for column, width in zip(columns, widths):
+                table.add_column(column.header, style=column.style, width=width, no_wrap=True, overflow="ellipsis")
+            for row in cells:
+                table.add_row(*(truncate(cell or column.empty, width)
+                                for cell, column, width in zip(row, columns, widths)))
+            console.print(table)
+            count += len(chunk)
+
+    if pager:
+        with console.pager(styles=True):
+            emit()
+    else:
+        emit()
+    return count
@@ -0,0 +1,21 @@
+from collections import namedtuple
+from functools import partial
+
+# Typed rows returned by the stores. They are namedtuples, so they take no
+# more memory than the plain tuples they replace (__slots__ = (), no per-row
+# dict) and existing index access such as note[1] keeps working next to
+# note.name. Each type's make() converts a fetched tuple without running any
+# Python code per row, which is cheaper than a cursor row_factory.
+
+
+def _row_type(name, fields):
+    cls = namedtuple(name, fields)
+    cls.make = partial(tuple.__new__, cls)
+    return cls
+
+
+Note = _row_type("Note", "id name content timestamp")
+Todo = _row_type("Todo", "id content deadline timestamp")
+CompletedTodo = _row_type("CompletedTodo", "id content deadline timestamp completed_at")
+HourEntry = _row_type("HourEntry", "id job_name hours_worked date")
+Appointment = _row_type("Appointment", "id title date time description")
@@ -0,0 +1,78 @@
+import re
+import sqlite3
+
+# Full-text indexes kept alongside their content tables. Each entry maps the
+# content table to its FTS5 table and the indexed columns.
+FTS_TABLES = {
+    "notes": ("notes_fts", ("name", "content")),
+    "todos": ("todos_fts", ("content",)),
+}
+
+# Markers wrapped around matched terms by highlight() and snippet().
+HIGHLIGHT_MARKERS = ("**", "**")
+
+_fts5_available = None
+
+
+def fts5_available(conn):
+    """Return True if this SQLite build can create FTS5 tables."""
+    global _fts5_available
+    if _fts5_available is None:
+        try:
+            conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+            conn.execute("DROP TABLE temp.fts5_probe")
+            _fts5_available = True
+        except sqlite3.OperationalError:
+            _fts5_available = False
+    return _fts5_available
+
+
+def fts_index_exists(conn, table):
+    """Return True if the FTS5 index for table has been created."""
+    fts, _ = FTS_TABLES[table]
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)).fetchone() is not None
+
+
+def create_fts_index(conn, table):
+    """Create the external-content FTS5 table and sync triggers for table.
+
+    Returns True if the index was newly created and populated.
+    """
+    fts, columns = FTS_TABLES[table]
+    exists = fts_index_exists(conn, table)
+    cols = ", ".join(columns)
+    new_cols = ", ".join(f"new.{c}" for c in columns)
+    old_cols = ", ".join(f"old.{c}" for c in columns)
+    conn.execute(f'''CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                        {cols}, content='{table}', content_rowid='id', prefix='2 3'
+                    )''')
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN
+                        INSERT INTO {fts} (rowid, {cols}) VALUES (new.id, {new_cols});
+                    END''')
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN
+                        INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+                    END''')
+    conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE OF {cols} ON {table} BEGIN
+                        INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+                        INSERT INTO {fts} (rowid, {cols}) VALUES (new.id, {new_cols});
+                    END''')
+    if not exists:
+        rebuild_fts_index(conn, table)
+    return not exists
+
+
+def rebuild_fts_index(conn, table):
+    """Repopulate the FTS5 index for table from its content table."""
+    fts, _ = FTS_TABLES[table]
+    conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+
+def match_query(keyword):
+    """Turn a plain keyword into an FTS5 query that prefix-matches every term.
+
+    Returns None when the keyword has no indexable terms.
+    """
+    terms = re.findall(r"\w+", keyword)
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
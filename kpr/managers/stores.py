@@ -0,0 +1,707 @@
+import functools
+import os
+import uuid
+
+from . import dates
+from .cache import DEFAULT_MAXSIZE, clear_cache, get_cache
+from .archive import default_archive_path, attach_archive, archive_rows, spanning, free_ratio, vacuum
+from .connection import get_pool, retry_busy, ungrouped
+from .ledger import PERIODS, bulk_hours
+from .profiling import timed
+from .migrations import migrate
+from . import backup, sync
+from .rows import Note, Todo, CompletedTodo, HourEntry, Appointment
+from .search import fts5_available, fts_index_exists, create_fts_index, rebuild_fts_index, match_query, HIGHLIGHT_MARKERS
+
+# Headless data layer. The stores never print or prompt: reads return rows,
+# adds return the new row id, bulk adds return a count, and updates/deletes
+# return whether a row was affected. The printing CLI managers in
+# kpr_manager.py are thin subclasses of these.
+
+DB_PATH = os.path.join(os.path.expanduser("~"), "kpr_db", "kpr.db")
+# Store methods with these prefixes only read; every other public method may write.
+READ_PREFIXES = ("search_", "list_", "iter_", "view_", "get_", "totals_", "remaining_")
+CHUNK_SIZE = 500
+# Most ids bound into one IN (...) list, well under SQLite's variable limit.
+MAX_IDS_PER_STATEMENT = 500
+
+def _where(*conditions):
+    """Return a WHERE clause and its parameters from the (sql, value) pairs whose value is set.
+
+    Each store query has at most a handful of such variants, so they all stay
+    in the connection's statement cache. Filters left out are not replaced by
+    catch-all bounds, which would steer the planner onto a range index scan.
+    """
+    used = [(sql, value) for sql, value in conditions if value]
+    if not used:
+        return "", ()
+    return "WHERE " + " AND ".join(sql for sql, _ in used), tuple(value for _, value in used)
+
+def _date_filters(date=None, start=None, end=None):
+    return (("date = ?", dates.normalize_date(date) if date else None),
+            ("date >= ?", dates.normalize_date(start) if start else None),
+            ("date <= ?", dates.normalize_date(end) if end else None))
+
+def _id_chunks(ids):
+    """Split ids into lists of at most MAX_IDS_PER_STATEMENT."""
+    ids = list(dict.fromkeys(ids))
+    return [ids[i:i + MAX_IDS_PER_STATEMENT] for i in range(0, len(ids), MAX_IDS_PER_STATEMENT)]
+
+def _retrying(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return retry_busy(lambda: func(*args, **kwargs))
+    return wrapper
+
+class DatabaseManager:
+    # Reads return the namedtuples from rows.py. Plain tuples are about a third
+    # cheaper to build, so bulk consumers may set this to False.
+    typed_rows = True
+
+    def __init_subclass__(cls, **kwargs):
+        # Public methods report their latency to metrics while it is enabled.
+        # Store writes are each one transaction, so they are re-run if the
+        # database stays locked past busy_timeout; the printing managers
+        # prompt, so theirs are not.
+        super().__init_subclass__(**kwargs)
+        for name, value in list(vars(cls).items()):
+            if callable(value) and not name.startswith('_'):
+                if cls.__module__ == __name__ and not name.startswith(READ_PREFIXES):
+                    value = _retrying(value)
+                setattr(cls, name, timed(f"{cls.__name__}.{name}", value))
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.archive_path = default_archive_path(db_path)
+        self._pool = get_pool(db_path)
+        self._cache = None
+        self._initialize_db()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _connect(self):
+        """Return this thread's pooled connection, shared by every manager on the same database."""
+        return self._pool.connection()
+
+    @ungrouped
+    def close(self):
+        """Close this thread's pooled connection; it reopens on next use."""
+        self._pool.close()
+        clear_cache(self.db_path)
+
+    @ungrouped
+    def close_all(self):
+        """Close every thread's pooled connection to this database, at shutdown."""
+        self._pool.close_all()
+        clear_cache(self.db_path)
+
+    @ungrouped
+    def submit(self, method, *args, **kwargs):
+        """Queue a write, e.g. store.submit(store.log_hours, "Food bank", 2.5); return a Future.
+
+        Writes submitted from any thread run on one writer thread per database
+        and are committed in groups, which sustains far more small writes per
+        second than committing each one.
+        """
+        return self._pool.writer().submit(method, *args, **kwargs)
+
+    def enable_cache(self, maxsize=DEFAULT_MAXSIZE, check_interval=0.0):
+        """Cache by-id lookups and searches in an LRU shared by every store on this database.
+
+        Any write, from this process or another, empties the cache before the
+        next cached read. With check_interval > 0, writes made on other
+        connections are only looked for that often.
+        """
+        self._cache = get_cache(self.db_path, maxsize, check_interval)
+        return self._cache
+
+    def disable_cache(self):
+        self._cache = None
+
+    def cache_stats(self):
+        """Return the cache's hit/miss counters, or None if caching is off."""
+        return self._cache.stats() if self._cache is not None else None
+
+    def _cached(self, key, load):
+        if self._cache is None:
+            return load()
+        return self._cache.get_or_load(self._connect(), key, load)
+
+    def _rows(self, cursor, row_type):
+        return list(map(row_type.make, cursor)) if self.typed_rows else cursor.fetchall()
+
+    def _get_by_id(self, row_type, query, row_id):
+        with self._connect() as conn:
+            row = conn.execute(query, (row_id,)).fetchone()
+        return row_type.make(row) if row is not None and self.typed_rows else row
+
+    def _archive_connect(self):
+        """Return this thread's connection with the archive database attached."""
+        conn = self._connect()
+        attach_archive(conn, self.archive_path)
+        return conn
+
+    def _source(self, table, include_archive):
+        """Return a connection and a FROM source for table, spanning the archive if asked."""
+        if include_archive:
+            return self._archive_connect(), spanning(table)
+        return self._connect(), table
+
+    @ungrouped
+    def vacuum(self, pages=None, archive=False):
+        """Reclaim free pages in the live database, or in the archive with archive=True."""
+        if archive:
+            vacuum(self._archive_connect(), 'archive', pages)
+        else:
+            vacuum(self._connect(), 'main', pages)
+
+    @ungrouped
+    def backup(self, dest=None, compress=None, verify=True, archive=False, progress=None):
+        """Back up the live database, or the archive with archive=True, while it stays writable.
+
+        Returns the backup's path; see backup.backup for dest and compress.
+        """
+        return backup.backup(self.archive_path if archive else self.db_path, dest, compress, verify,
+                             progress=progress)
+
+    @ungrouped
+    def restore(self, backup_path, verify=True, archive=False):
+        """Swap a backup in for the live database (or the archive); return where the old file was kept.
+
+        Every pooled connection in this process is closed first, so no other
+        thread may be using the database while this runs, and other
+        processes (including the daemon) must be stopped. The restored file
+        is then migrated to the current schema, and the cache and search
+        settings are reset.
+        """
+        self._pool.close_all()
+        clear_cache(self.db_path)
+        previous = backup.restore(backup_path, self.archive_path if archive else self.db_path, verify)
+        self._initialize_db()
+        clear_cache(self.db_path)
+        return previous
+
+    @ungrouped
+    def maybe_vacuum(self, min_free_ratio=0.2, pages=None):
+        """Vacuum the live database once at least min_free_ratio of its pages are free.
+
+        Cheap enough to call after every archive or bulk delete; returns
+        whether a vacuum ran.
+        """
+        if free_ratio(self._connect()) < min_free_ratio:
+            return False
+        self.vacuum(pages)
+        return True
+
+    def _iter_page(self, row_type, select, after_id=None, limit=None, chunk_size=CHUNK_SIZE, where=None, params=()):
+        """Yield rows of select in id order, starting after after_id, fetched chunk_size at a time.
+
+        Paging on the primary key (keyset pagination) keeps every page an index
+        range scan, however deep into the table it starts.
+        """
+        query = f"{select} WHERE id > ?"
+        if where:
+            query += f" AND {where}"
+        query += " ORDER BY id LIMIT ?"
+        cursor = self._connect().execute(query, (after_id or 0, *params, -1 if limit is None else limit))
+        make = row_type.make if self.typed_rows else None
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from (map(make, rows) if make else rows)
+        finally:
+            cursor.close()
+
+    def _delete_by_ids(self, table, ids):
+        """Delete rows of table by id in one transaction; return how many were deleted."""
+        deleted = 0
+        with self._connect() as conn:
+            for chunk in _id_chunks(ids):
+                cursor = conn.execute(f"DELETE FROM {table} WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+                deleted += cursor.rowcount
+        return deleted
+
+    def current_seq(self):
+        """Return the newest change-log sequence number."""
+        return sync.current_seq(self._connect())
+
+    def export_changes(self, path, since=None, peer=None):
+        """Write rows changed since a change-log seq (or since the last export to peer) to path."""
+        return sync.export_changes(self._connect(), path, since, peer)
+
+    def import_changes(self, path):
+        """Merge a change file exported by another kpr database; return how many changes were applied."""
+        return sync.import_changes(self._connect(), path)
+
+    def _initialize_db(self):
+        conn = self._connect()
+        migrate(conn)
+        self.fts_enabled = fts5_available(conn) and fts_index_exists(conn, 'notes')
+
+    def _rebuild_search_index(self, table):
+        with self._connect() as conn:
+            if not fts5_available(conn):
+                return False
+            if not create_fts_index(conn, table):
+                rebuild_fts_index(conn, table)
+        self.fts_enabled = True
+        return True
+
+class NoteStore(DatabaseManager):
+    def __init__(self, db_path=DB_PATH):
+        super().__init__(db_path)
+
+    def add_note(self, name, content):
+        note_uuid = str(uuid.uuid4())
+        timestamp = dates.now()
+        with self._connect() as conn:
+            cursor = conn.execute('''
+                INSERT INTO notes (uuid, name, content, timestamp)
+                VALUES (?, ?, ?, ?)
+            ''', (note_uuid, name, content, timestamp))
+        return cursor.lastrowid
+
+    def add_notes_bulk(self, notes):
+        """Insert (name, content) pairs from any iterable in a single transaction."""
+        timestamp = dates.now()
+        rows = ((str(uuid.uuid4()), name, content, timestamp) for name, content in notes)
+        with self._connect() as conn, sync.bulk_logged(conn, 'notes'):
+            return conn.executemany('''
+                INSERT INTO notes (uuid, name, content, timestamp)
+                VALUES (?, ?, ?, ?)
+            ''', rows).rowcount
+
+    def search_notes(self, keyword):
+        return self._cached(('search_notes', keyword), lambda: self._search_notes(keyword))
+
+    def _search_notes(self, keyword):
+        query = match_query(keyword) if self.fts_enabled else None
+        if query is None:
+            with self._connect() as conn:
+                cursor = conn.execute('''
+                    SELECT id, name, content, timestamp
+                    FROM notes
+                    WHERE name LIKE ? OR content LIKE ?
+                ''', ('%' + keyword + '%', '%' + keyword + '%'))
+                return self._rows(cursor, Note)
+        return self.search_notes_fts(query)
+
+    def search_notes_fts(self, query, limit=None, snippets=False):
+        """Run an FTS5 query (terms, "phrases", prefix*) ranked by bm25, name weighted above content.
+
+        With snippets=True the name is highlighted and the content is reduced
+        to a highlighted snippet around the matches.
+        """
+        if snippets:
+            columns = "n.id, highlight(notes_fts, 0, ?, ?), snippet(notes_fts, 1, ?, ?, '...', 16), n.timestamp"
+            params = HIGHLIGHT_MARKERS * 2
+        else:
+            columns = "n.id, n.name, n.content, n.timestamp"
+            params = ()
+        with self._connect() as conn:
+            cursor = conn.execute(f'''
+                SELECT {columns}
+                FROM notes_fts
+                JOIN notes n ON n.id = notes_fts.rowid
+                WHERE notes_fts MATCH ?
+                ORDER BY bm25(notes_fts, 10.0, 1.0)
+                LIMIT ?
+            ''', params + (query, -1 if limit is None else limit))
+            return self._rows(cursor, Note)
+
+    def rebuild_search_index(self):
+        """Create or repopulate the notes full-text index; False if FTS5 is unavailable."""
+        return self._rebuild_search_index('notes')
+
+    def update_note_by_id(self, note_id, new_name=None, new_content=None):
+        """Update the given fields in a single statement; empty values keep the current ones."""
+        with self._connect() as conn:
+            cursor = conn.execute('''
+                UPDATE notes
+                SET name = COALESCE(NULLIF(?, ''), name),
+                    content = COALESCE(NULLIF(?, ''), content),
+                    timestamp = ?
+                WHERE id = ?
+            ''', (new_name, new_content, dates.now(), note_id))
+        return cursor.rowcount > 0
+
+    def delete_note_by_id(self, note_id):
+        with self._connect() as conn:
+            cursor = conn.execute('''
+                DELETE FROM notes WHERE id = ?
+            ''', (note_id,))
+        return cursor.rowcount > 0
+
+    def delete_notes_by_ids(self, note_ids):
+        """Delete many notes in one transaction; return how many were deleted."""
+        return self._delete_by_ids('notes', note_ids)
+
+    def list_notes(self):
+        with self._connect() as conn:
+            cursor = conn.execute('''
+                SELECT id, name, content, timestamp FROM notes
+            ''')
+            return self._rows(cursor, Note)
+
+    def iter_notes(self, after_id=None, limit=None, chunk_size=CHUNK_SIZE):
+        """Stream notes in id order; pass the last seen id as after_id to fetch the next page."""
+        return self._iter_page(Note, "SELECT id, name, content, timestamp FROM notes", after_id, limit, chunk_size)
+
+    def get_note_by_id(self, note_id):
+        return self._cached(('note', note_id), lambda: self._get_by_id(
+            Note, "SELECT id, name, content, timestamp FROM notes WHERE id = ?", note_id))
+
+class ToDoStore(DatabaseManager):
+    def __init__(self, db_path=DB_PATH):
+        super().__init__(db_path)
+
+    def add_todo(self, content, deadline=None):
+        todo_uuid = str(uuid.uuid4())
+        timestamp = dates.now()
+        with self._connect() as conn:
+            cursor = conn.execute("INSERT INTO todos (uuid, content, deadline, timestamp) VALUES (?, ?, ?, ?)",
+                                  (todo_uuid, content, dates.normalize_deadline(deadline), timestamp))
+        return cursor.lastrowid
+
+    def add_todos_bulk(self, todos):
+        """Insert (content, deadline) pairs from any iterable in a single transaction."""
+        timestamp = dates.now()
+        rows = ((str(uuid.uuid4()), content, dates.normalize_deadline(deadline), timestamp)
+                for content, deadline in todos)
+        with self._connect() as conn, sync.bulk_logged(conn, 'todos'):
+            return conn.executemany("INSERT INTO todos (uuid, content, deadline, timestamp) VALUES (?, ?, ?, ?)",
+                                    rows).rowcount
+
+    def search_todos(self, keyword):
+        return self._cached(('search_todos', keyword), lambda: self._search_todos(keyword))
+
+    def _search_todos(self, keyword):
+        query = match_query(keyword) if self.fts_enabled else None
+        if query is None:
+            with self._connect() as conn:
+                cursor = conn.execute("SELECT id, content, deadline, timestamp FROM todos WHERE content LIKE ?", ('%' + keyword + '%',))
+                return self._rows(cursor, Todo)
+        return self.search_todos_fts(query)
+
+    def search_todos_fts(self, query, limit=None, snippets=False):
+        """Run an FTS5 query (terms, "phrases", prefix*) over to-do content ranked by bm25."""
+        if snippets:
+            columns = "t.id, snippet(todos_fts, 0, ?, ?, '...', 16), t.deadline, t.timestamp"
+            params = HIGHLIGHT_MARKERS
+        else:
+            columns = "t.id, t.content, t.deadline, t.timestamp"
+            params = ()
+        with self._connect() as conn:
+            cursor = conn.execute(f'''
+                SELECT {columns}
+                FROM todos_fts
+                JOIN todos t ON t.id = todos_fts.rowid
+                WHERE todos_fts MATCH ?
+                ORDER BY bm25(todos_fts)
+                LIMIT ?
+            ''', params + (query, -1 if limit is None else limit))
+            return self._rows(cursor, Todo)
+
+    def rebuild_search_index(self):
+        """Create or repopulate the to-do full-text index; False if FTS5 is unavailable."""
+        return self._rebuild_search_index('todos')
+
+    def list_todos(self):
+        with self._connect() as conn:
+            cursor = conn.execute("SELECT id, content, deadline, timestamp FROM todos")
+            return self._rows(cursor, Todo)
+
+    def get_todo_by_id(self, todo_id):
+        return self._cached(('todo', todo_id), lambda: self._get_by_id(
+            Todo, "SELECT id, content, deadline, timestamp FROM todos WHERE id = ?", todo_id))
+
+    def iter_todos(self, after_id=None, limit=None, chunk_size=CHUNK_SIZE):
+        """Stream to-dos in id order; pass the last seen id as after_id to fetch the next page."""
+        return self._iter_page(Todo, "SELECT id, content, deadline, timestamp FROM todos", after_id, limit, chunk_size)
+
+    def update_todo_by_id(self, todo_id, new_content=None, new_deadline=None):
+        """Update the given fields in a single statement; empty values keep the current ones."""
+        with self._connect() as conn:
+            cursor = conn.execute('''
+                UPDATE todos
+                SET content = COALESCE(NULLIF(?, ''), content),
+                    deadline = COALESCE(NULLIF(?, ''), deadline)
+                WHERE id = ?
+            ''', (new_content, dates.normalize_deadline(new_deadline), todo_id))
+        return cursor.rowcount > 0
+
+    def delete_todo_by_id(self, todo_id):
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM todos WHERE id = ?", (todo_id,))
+        return cursor.rowcount > 0
+
+    def delete_todos_by_ids(self, todo_ids):
+        """Delete many to-dos in one transaction; return how many were deleted."""
+        return self._delete_by_ids('todos', todo_ids)
+
+    def mark_completed_by_id(self, todo_id):
+        return self._mark_completed(ids=[todo_id]) > 0
+
+    def mark_completed(self, ids=None, keyword=None, start=None, end=None):
+        """Move every to-do matching all given filters to completed_todos; return how many moved.
+
+        Filters are a list of ids, a search keyword (full-text when available)
+        and a deadline range, start and end inclusive. Each batch is copied
+        with one INSERT ... SELECT and removed with one DELETE, all in a single
+        transaction. Completed rows keep the to-do's uuid.
+        """
+        return self._mark_completed(ids, keyword, start, end)
+
+    def _mark_completed(self, ids=None, keyword=None, start=None, end=None):
+        # Shared by mark_completed and mark_completed_by_id, so neither goes
+        # through the other's retry wrapper or a subclass's printing override.
+        conditions, params = [], []
+        if keyword:
+            query = match_query(keyword) if self.fts_enabled else None
+            if query is None:
+                conditions.append("content LIKE ?")
+                params.append('%' + keyword + '%')
+            else:
+                conditions.append("id IN (SELECT rowid FROM todos_fts WHERE todos_fts MATCH ?)")
+                params.append(query)
+        if start:
+            conditions.append("deadline >= ?")
+            params.append(dates.normalize_date(start))
+        if end:
+            # Deadlines may carry a time of day, so compare against the next day.
+            conditions.append("deadline < date(?, '+1 day')")
+            params.append(dates.normalize_date(end))
+        if ids is not None:
+            batches = _id_chunks(ids)
+        elif conditions:
+            batches = [None]
+        else:
+            raise ValueError("mark_completed needs ids, a keyword or a deadline range")
+
+        completed_at = dates.now()
+        moved = 0
+        with self._connect() as conn:
+            for chunk in batches:
+                where, where_params = list(conditions), list(params)
+                if chunk is not None:
+                    where.append(f"id IN ({', '.join('?' * len(chunk))})")
+                    where_params.extend(chunk)
+                where = " AND ".join(where)
+                cursor = conn.execute(f'''
+                    INSERT INTO completed_todos (uuid, content, deadline, timestamp, completed_at)
+                    SELECT COALESCE(uuid, lower(hex(randomblob(16)))), content, deadline, timestamp, ?
+                    FROM todos WHERE {where}
+                ''', [completed_at] + where_params)
+                moved += cursor.rowcount
+                conn.execute(f"DELETE FROM todos WHERE {where}", where_params)
+        return moved
+
+    def delete_completed_todos_by_ids(self, todo_ids):
+        """Delete many completed to-dos in one transaction; return how many were deleted."""
+        return self._delete_by_ids('completed_todos', todo_ids)
+
+    def list_completed_todos(self, include_archive=False):
+        conn, source = self._source('completed_todos', include_archive)
+        with conn:
+            cursor = conn.execute(f"SELECT id, content, deadline, timestamp, completed_at FROM {source}")
+            return self._rows(cursor, CompletedTodo)
+
+    def iter_completed_todos(self, after_id=None, limit=None, chunk_size=CHUNK_SIZE, include_archive=False):
+        """Stream completed to-dos in id order; pass the last seen id as after_id to fetch the next page."""
+        source = self._source('completed_todos', include_archive)[1]
+        return self._iter_page(CompletedTodo, f"SELECT id, content, deadline, timestamp, completed_at FROM {source}",
+                               after_id, limit, chunk_size)
+
+    def archive_completed_todos(self, before):
+        """Move to-dos completed before the given date into the archive database; return how many moved."""
+        conn = self._archive_connect()
+        with conn:
+            return archive_rows(conn, 'completed_todos', dates.normalize_date(before))
+
+class HourStore(DatabaseManager):
+    def __init__(self, db_path=DB_PATH):
+        super().__init__(db_path)
+
+    def set_total_hours(self, total_hours):
+        with self._connect() as conn:
+            # Update the service hours if they already exist
+            conn.execute("""
+                INSERT OR REPLACE INTO service_hours (id, total_hours, remaining_hours)
+                VALUES (1, ?, ?)
+            """, (total_hours, total_hours))
+
+    def log_hours(self, job_name, hours_worked, date=None):
+        hour_uuid = str(uuid.uuid4())
+        date = dates.normalize_date(date) if date else dates.today()
+        with self._connect() as conn:
+            cursor = conn.execute("INSERT INTO hours (uuid, job_name, hours_worked, date) VALUES (?, ?, ?, ?)",
+                                  (hour_uuid, job_name, hours_worked, date))
+        return cursor.lastrowid
+
+    def log_hours_bulk(self, entries):
+        """Insert (job_name, hours_worked[, date]) entries in a single transaction.
+
+        Entries are streamed straight into executemany with the per-row
+        ledger trigger suspended, and hours_daily and service_hours are then
+        updated once for the whole batch.
+        """
+        today = dates.today()
+
+        def rows():
+            for entry in entries:
+                job_name, hours_worked = entry[0], entry[1]
+                date = dates.normalize_date(entry[2]) if len(entry) > 2 and entry[2] else today
+                yield (str(uuid.uuid4()), job_name, hours_worked, date)
+
+        with self._connect() as conn, bulk_hours(conn), sync.bulk_logged(conn, 'hours'):
+            return conn.executemany("INSERT INTO hours (uuid, job_name, hours_worked, date) VALUES (?, ?, ?, ?)",
+                                    rows()).rowcount
+
+    def view_hours(self, date=None, start=None, end=None, include_archive=False):
+        """Return hour entries for one date, or between start and end inclusive, ordered by date.
+
+        Only live entries are read unless include_archive is set.
+        """
+        conn, source = self._source('hours', include_archive)
+        where, params = _where(*_date_filters(date, start, end))
+        with conn:
+            cursor = conn.execute(f"SELECT id, job_name, hours_worked, date FROM {source} {where} ORDER BY date, id", params)
+            return self._rows(cursor, HourEntry)
+
+    def iter_hours(self, date=None, after_id=None, limit=None, chunk_size=CHUNK_SIZE):
+        """Stream hour entries in id order, optionally for one date, a page at a time."""
+        where, params = ("date = ?", (dates.normalize_date(date),)) if date else (None, ())
+        return self._iter_page(HourEntry, "SELECT id, job_name, hours_worked, date FROM hours",
+                               after_id, limit, chunk_size, where, params)
+
+    def get_hours_by_id(self, hour_id):
+        return self._cached(('hours', hour_id), lambda: self._get_by_id(
+            HourEntry, "SELECT id, job_name, hours_worked, date FROM hours WHERE id = ?", hour_id))
+
+    def update_hours_by_id(self, hour_id, new_hours, new_date=None):
+        # The ledger triggers move the difference into service_hours.
+        with self._connect() as conn:
+            cursor = conn.execute("UPDATE hours SET hours_worked = ?, date = ? WHERE id = ?",
+                                  (new_hours, dates.normalize_date(new_date) if new_date else dates.today(), hour_id))
+        return cursor.rowcount > 0
+
+    def delete_hours_by_id(self, hour_id):
+        # The ledger triggers give the deleted hours back to service_hours.
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM hours WHERE id = ?", (hour_id,))
+        return cursor.rowcount > 0
+
+    def archive_hours(self, before):
+        """Move hour entries dated before the given date into the archive database; return how many moved.
+
+        Archived hours still count towards the ledger totals and remaining
+        service hours.
+        """
+        conn = self._archive_connect()
+        with conn:
+            return archive_rows(conn, 'hours', dates.normalize_date(before))
+
+    def delete_hours_by_ids(self, hour_ids):
+        """Delete many hour entries in one transaction; the ledger triggers return their hours."""
+        return self._delete_by_ids('hours', hour_ids)
+
+    def totals_by_job(self, start=None, end=None):
+        """Return (job_name, hours, entries) per job, optionally limited to a date range.
+
+        Answered from the hours_daily ledger, so the cost grows with the number
+        of job-days rather than the number of logged entries.
+        """
+        where, params = _where(*_date_filters(start=start, end=end))
+        with self._connect() as conn:
+            return conn.execute(f"SELECT job_name, SUM(hours), SUM(entries) FROM hours_daily {where} "
+                                "GROUP BY job_name ORDER BY job_name", params).fetchall()
+
+    def totals_by_period(self, granularity="week", start=None, end=None, job_name=None):
+        """Return (period, hours, entries) per day, week, month or year from the hours_daily ledger."""
+        if granularity not in PERIODS:
+            raise ValueError(f"granularity must be one of {', '.join(PERIODS)}")
+        period = PERIODS[granularity]
+        where, params = _where(*_date_filters(start=start, end=end), ("job_name = ?", job_name))
+        with self._connect() as conn:
+            return conn.execute(f"SELECT {period} AS period, SUM(hours), SUM(entries) FROM hours_daily {where} "
+                                "GROUP BY period ORDER BY period", params).fetchall()
+
+    def remaining_hours(self):
+        """Return the remaining service hours, or None if no total has been set."""
+        with self._connect() as conn:
+            result = conn.execute("SELECT remaining_hours FROM service_hours WHERE id = 1").fetchone()
+        return result[0] if result else None
+
+class CalendarStore(DatabaseManager):
+    def __init__(self, db_path=DB_PATH):
+        super().__init__(db_path)
+
+    def add_appointment(self, title, date, time=None, description=None):
+        appointment_uuid = str(uuid.uuid4())
+        with self._connect() as conn:
+            cursor = conn.execute("INSERT INTO appointments (uuid, title, date, time, description) VALUES (?, ?, ?, ?, ?)",
+                                  (appointment_uuid, title, dates.normalize_date(date), dates.normalize_time(time), description))
+        return cursor.lastrowid
+
+    def add_appointments_bulk(self, appointments):
+        """Insert (title, date[, time[, description]]) entries in a single transaction."""
+        def rows():
+            for appointment in appointments:
+                title, date, time, description = (tuple(appointment) + (None, None))[:4]
+                yield (str(uuid.uuid4()), title, dates.normalize_date(date), dates.normalize_time(time), description)
+
+        with self._connect() as conn, sync.bulk_logged(conn, 'appointments'):
+            return conn.executemany("INSERT INTO appointments (uuid, title, date, time, description) VALUES (?, ?, ?, ?, ?)",
+                                    rows()).rowcount
+
+    def view_appointments(self, date=None, start=None, end=None):
+        """Return appointments for one date, or between start and end inclusive, in date and time order."""
+        where, params = _where(*_date_filters(date, start, end))
+        with self._connect() as conn:
+            cursor = conn.execute(f"SELECT id, title, date, time, description FROM appointments {where} "
+                                  "ORDER BY date, time, id", params)
+            return self._rows(cursor, Appointment)
+
+    def iter_appointments(self, date=None, after_id=None, limit=None, chunk_size=CHUNK_SIZE):
+        """Stream appointments in id order, optionally for one date, a page at a time."""
+        where, params = ("date = ?", (dates.normalize_date(date),)) if date else (None, ())
+        return self._iter_page(Appointment, "SELECT id, title, date, time, description FROM appointments",
+                               after_id, limit, chunk_size, where, params)
+
+    def get_appointment_by_id(self, appointment_id):
+        return self._cached(('appointment', appointment_id), lambda: self._get_by_id(
+            Appointment, "SELECT id, title, date, time, description FROM appointments WHERE id = ?", appointment_id))
+
+    def update_appointment_by_id(self, appointment_id, new_title=None, new_date=None, new_time=None, new_description=None):
+        """Update the given fields in a single statement; empty values keep the current ones."""
+        with self._connect() as conn:
+            cursor = conn.execute('''
+                UPDATE appointments
+                SET title = COALESCE(NULLIF(?, ''), title),
+                    date = COALESCE(NULLIF(?, ''), date),
+                    time = COALESCE(NULLIF(?, ''), time),
+                    description = COALESCE(NULLIF(?, ''), description)
+                WHERE id = ?
+            ''', (new_title, dates.normalize_date(new_date), dates.normalize_time(new_time), new_description,
+                  appointment_id))
+        return cursor.rowcount > 0
+
+    def delete_appointment_by_id(self, appointment_id):
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM appointments WHERE id = ?", (appointment_id,))
+        return cursor.rowcount > 0
+
+    def delete_appointments_by_ids(self, appointment_ids):
+        """Delete many appointments in one transaction; return how many were deleted."""
+        return self._delete_by_ids('appointments', appointment_ids)
+
+    def list_appointments(self):
+        with self._connect() as conn:
+            cursor = conn.execute("SELECT id, title, date, time, description FROM appointments")
+            return self._rows(cursor, Appointment)
@@ -0,0 +1,203 @@
+import json
+from contextlib import contextmanager
+
+# Change feed for syncing kpr databases between machines. Triggers record
+# every insert, update and delete in kpr_changes, one row per (table, uuid)
+# holding the latest operation under a fresh, monotonically increasing seq.
+# Deltas since a seq are exported as JSON lines keyed on uuid and merged on
+# the other side with upserts, so only changed rows travel and edits to
+# different rows on different machines no longer overwrite each other.
+
+FORMAT_VERSION = 1
+
+# Synced tables and the columns exported for them; ids are local to each
+# database and never leave it.
+SYNCED_TABLES = {
+    "notes": ("uuid", "name", "content", "timestamp"),
+    "todos": ("uuid", "content", "deadline", "timestamp"),
+    "completed_todos": ("uuid", "content", "deadline", "timestamp", "completed_at"),
+    "hours": ("uuid", "job_name", "hours_worked", "date"),
+    "appointments": ("uuid", "title", "date", "time", "description"),
+}
+
+BATCH_SIZE = 500
+
+# Archiving moves rows rather than deleting them, and imported changes must
+# not be logged again or they would echo back to where they came from.
+_LOGGED = "NOT EXISTS (SELECT 1 FROM kpr_flags WHERE name IN ('archiving', 'importing'))"
+# Inserts made while bulk_insert is set are logged by bulk_logged() in one
+# statement instead of a trigger run per row.
+_LOGGED_INSERT = "NOT EXISTS (SELECT 1 FROM kpr_flags WHERE name IN ('archiving', 'importing', 'bulk_insert'))"
+
+
+def create_change_log(conn):
+    """Create kpr_changes, kpr_sync_peers and the change triggers on every synced table."""
+    conn.execute('''CREATE TABLE IF NOT EXISTS kpr_changes (
+                        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                        tbl TEXT NOT NULL,
+                        uuid TEXT NOT NULL,
+                        op TEXT NOT NULL,
+                        changed_at TEXT NOT NULL,
+                        UNIQUE (tbl, uuid)
+                    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS kpr_sync_peers (
+                        peer TEXT PRIMARY KEY,
+                        exported_seq INTEGER NOT NULL DEFAULT 0
+                    )''')
+    for table in SYNCED_TABLES:
+        # Rows from before uuids were always set need one to be synced at all.
+        conn.execute(f"UPDATE {table} SET uuid = lower(hex(randomblob(16))) WHERE uuid IS NULL")
+        for suffix, event, ref, op in (("ai", "INSERT", "new", "upsert"),
+                                       ("au", "UPDATE", "new", "upsert"),
+                                       ("ad", "DELETE", "old", "delete")):
+            conn.execute(f'''CREATE TRIGGER IF NOT EXISTS {table}_changes_{suffix}
+                             AFTER {event} ON {table} WHEN {ref}.uuid IS NOT NULL AND {_LOGGED}
+                             BEGIN
+                                 INSERT OR REPLACE INTO kpr_changes (tbl, uuid, op, changed_at)
+                                 VALUES ('{table}', {ref}.uuid, '{op}', datetime('now', 'localtime'));
+                             END''')
+
+
+def guard_bulk_inserts(conn):
+    """Recreate the insert triggers so bulk inserts can be logged in one pass."""
+    for table in SYNCED_TABLES:
+        conn.execute(f"DROP TRIGGER IF EXISTS {table}_changes_ai")
+        conn.execute(f'''CREATE TRIGGER {table}_changes_ai
+                         AFTER INSERT ON {table} WHEN new.uuid IS NOT NULL AND {_LOGGED_INSERT}
+                         BEGIN
+                             INSERT OR REPLACE INTO kpr_changes (tbl, uuid, op, changed_at)
+                             VALUES ('{table}', new.uuid, 'upsert', datetime('now', 'localtime'));
+                         END''')
+
+
+@contextmanager
+def bulk_logged(conn, table):
+    """Log the rows inserted into table in the enclosing block with one INSERT ... SELECT.
+
+    Must run inside a transaction. AUTOINCREMENT ids only grow, so the
+    block's rows are exactly those past the largest id seen on entry.
+    """
+    last_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+    conn.execute("INSERT OR IGNORE INTO kpr_flags (name) VALUES ('bulk_insert')")
+    try:
+        yield
+    finally:
+        conn.execute("DELETE FROM kpr_flags WHERE name = 'bulk_insert'")
+    conn.execute(f'''INSERT OR REPLACE INTO kpr_changes (tbl, uuid, op, changed_at)
+                     SELECT '{table}', uuid, 'upsert', datetime('now', 'localtime') FROM {table}
+                     WHERE id > ? AND uuid IS NOT NULL AND {_LOGGED} ORDER BY id''', (last_id,))
+
+
+def current_seq(conn):
+    """Return the newest change sequence number, 0 if nothing has changed yet."""
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM kpr_changes").fetchone()[0]
+
+
+def peer_seq(conn, peer):
+    """Return the last seq exported to peer, 0 if it has never been synced."""
+    row = conn.execute("SELECT exported_seq FROM kpr_sync_peers WHERE peer = ?", (peer,)).fetchone()
+    return row[0] if row else 0
+
+
+def iter_changes(conn, since=0, batch_size=BATCH_SIZE):
+    """Yield change records newer than since, in seq order.
+
+    Each record is a dict with seq, table, op, uuid and, for upserts, the
+    row's synced columns. Upserts for rows that have since been archived are
+    skipped.
+    """
+    cursor = conn.execute("SELECT seq, tbl, uuid, op FROM kpr_changes WHERE seq > ? ORDER BY seq", (since,))
+    try:
+        while True:
+            changes = cursor.fetchmany(batch_size)
+            if not changes:
+                break
+            rows = {}
+            for table in {tbl for _, tbl, _, op in changes if op == "upsert"}:
+                columns = SYNCED_TABLES[table]
+                uuids = [uuid for _, tbl, uuid, op in changes if tbl == table and op == "upsert"]
+                found = conn.execute(f"SELECT {', '.join(columns)} FROM {table} "
+                                     f"WHERE uuid IN ({', '.join('?' * len(uuids))})", uuids)
+                rows.update(((table, row[0]), dict(zip(columns, row))) for row in found)
+            for seq, table, uuid, op in changes:
+                record = {"seq": seq, "table": table, "op": op, "uuid": uuid}
+                if op == "upsert":
+                    record["row"] = rows.get((table, uuid))
+                    if record["row"] is None:
+                        continue
+                yield record
+    finally:
+        cursor.close()
+
+
+def export_changes(conn, path, since=None, peer=None):
+    """Write changes newer than since to path as JSON lines; return the last seq exported.
+
+    With a peer name and no since, the export continues from where the last
+    export to that peer stopped, and the peer's position is advanced.
+    """
+    if since is None:
+        since = peer_seq(conn, peer) if peer else 0
+    until = current_seq(conn)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"kpr_changes": FORMAT_VERSION, "since": since, "until": until}) + "\n")
+        for record in iter_changes(conn, since):
+            if record["seq"] > until:
+                break
+            f.write(json.dumps(record) + "\n")
+    if peer:
+        with conn:
+            conn.execute('''INSERT INTO kpr_sync_peers (peer, exported_seq) VALUES (?, ?)
+                            ON CONFLICT (peer) DO UPDATE SET exported_seq = excluded.exported_seq''', (peer, until))
+    return until
+
+
+def _read_changes(path):
+    with open(path, encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("kpr_changes") != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a kpr change file")
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _apply(conn, table, op, batch):
+    columns = SYNCED_TABLES[table]
+    if op == "delete":
+        conn.executemany(f"DELETE FROM {table} WHERE uuid = ?", [(uuid,) for uuid in batch])
+        return
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns[1:])
+    conn.executemany(f'''INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})
+                         ON CONFLICT (uuid) DO UPDATE SET {updates}''',
+                     [tuple(row.get(column) for column in columns) for row in batch])
+
+
+def import_changes(conn, path, batch_size=BATCH_SIZE):
+    """Merge a change file into the database in one transaction; return how many changes were applied.
+
+    Runs of changes to the same table and operation are applied with one
+    executemany each, keeping the file's order. Incoming rows replace local
+    rows with the same uuid. Imported changes are not logged locally, so
+    they are not exported back to their origin.
+    """
+    applied = 0
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO kpr_flags (name) VALUES ('importing')")
+        try:
+            key, batch = None, []
+            for record in _read_changes(path):
+                table, op = record["table"], record["op"]
+                if table not in SYNCED_TABLES or op not in ("upsert", "delete"):
+                    raise ValueError(f"Unknown change {op!r} on {table!r} in {path}")
+                if (table, op) != key or len(batch) >= batch_size:
+                    if batch:
+                        _apply(conn, *key, batch)
+                    key, batch = (table, op), []
+                batch.append(record["row"] if op == "upsert" else record["uuid"])
+                applied += 1
+            if batch:
+                _apply(conn, *key, batch)
+        finally:
+            conn.execute("DELETE FROM kpr_flags WHERE name = 'importing'")
+    return applied